@@ -0,0 +1,45 @@
+import random
+import sys
+import time
+
+from brackets import create_bracket, open_matches, report, swiss_next_round
+
+
+def bench_swiss(teams, rounds):
+    seeds = [f"team-{i}" for i in range(teams)]
+    random.seed(teams)
+    start = time.perf_counter()
+    data = create_bracket("swiss", seeds, rounds)
+    timings = [time.perf_counter() - start]
+    for _ in range(rounds - 1):
+        for match in open_matches(data):
+            report(data, match["id"], random.choice(match["teams"]))
+        start = time.perf_counter()
+        swiss_next_round(data)
+        timings.append(time.perf_counter() - start)
+    seen = set()
+    rematches = 0
+    for match in data["matches"].values():
+        pair = frozenset(match["teams"])
+        rematches += pair in seen
+        seen.add(pair)
+    return timings, rematches
+
+
+def bench_elimination(bracket_format, teams):
+    seeds = [f"team-{i}" for i in range(teams)]
+    start = time.perf_counter()
+    create_bracket(bracket_format, seeds)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [64, 512, 2000, 8000]
+    for teams in sizes:
+        rounds = max(1, (teams - 1).bit_length())
+        timings, rematches = bench_swiss(teams, rounds)
+        print(f"swiss   {teams:>6} teams {rounds:>2} rounds: worst round {max(timings) * 1000:8.2f} ms, "
+              f"mean {sum(timings) / len(timings) * 1000:8.2f} ms, rematches {rematches}")
+    for bracket_format in ("single", "double"):
+        for teams in sizes:
+            print(f"{bracket_format:<7} {teams:>6} teams: built in {bench_elimination(bracket_format, teams) * 1000:8.2f} ms")
@@ -0,0 +1,48 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+from storage import GuildStorage, load_json, save_json
+
+
+def make_tournaments(count, teams=16):
+    data = {}
+    for i in range(count):
+        data[str(100000 + i)] = {
+            "tournament_name": f"Tournament {i}",
+            "status": "running",
+            "registerd_teams": teams,
+            "teams": {f"{i}-{t}": {"team_name": f"Team {t}", "registration": "Approved"} for t in range(teams)},
+        }
+    return data
+
+
+def time_lookups(load, guild_ids, lookups=200):
+    random.seed(len(guild_ids))
+    start = time.perf_counter()
+    for _ in range(lookups):
+        guild_id = random.choice(guild_ids)
+        load(guild_id).get("100000")
+    return (time.perf_counter() - start) / lookups
+
+
+if __name__ == "__main__":
+    per_guild = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    counts = [10, 100, 1000, 10000]
+    with tempfile.TemporaryDirectory() as root:
+        for count in counts:
+            guild_ids = list(range(count))
+            storage = GuildStorage(os.path.join(root, f"partitioned-{count}"))
+            single_path = os.path.join(root, f"single-{count}.json")
+            single = {}
+            for guild_id in guild_ids:
+                tournaments = make_tournaments(per_guild)
+                save_json(storage.path(guild_id, "tournaments.json"), tournaments)
+                single[str(guild_id)] = tournaments
+            save_json(single_path, single)
+            partitioned = time_lookups(lambda guild_id: load_json(storage.path(guild_id, "tournaments.json")), guild_ids)
+            lookups = 20 if count >= 1000 else 200
+            shared = time_lookups(lambda guild_id: load_json(single_path).get(str(guild_id), {}), guild_ids, lookups)
+            print(f"{count:>6} guilds: per-guild file {partitioned * 1e3:8.3f} ms, single file {shared * 1e3:9.3f} ms per lookup")
@@ -0,0 +1,62 @@
+import gc
+import random
+import sys
+import tracemalloc
+
+import discord
+from discord.state import ConnectionState
+
+from member_cache import MemberCache, client_options
+
+
+def member_payload(user_id):
+    return {"user": {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None, "global_name": f"User {user_id}"},
+            "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}
+
+
+def guild_payload(guild_id, members, with_members):
+    # what the gateway hands over for a guild: members (via chunking) and
+    # presences only arrive when the members and presences intents are on
+    data = {
+        "id": str(guild_id), "name": f"guild {guild_id}", "icon": None, "owner_id": "1", "member_count": members,
+        "roles": [{"id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                   "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [{"id": str(guild_id * 100 + i), "type": 0, "name": f"channel-{i}", "position": i, "permission_overwrites": []} for i in range(20)],
+        "members": [], "presences": [],
+    }
+    if with_members:
+        data["members"] = [member_payload(guild_id * 10 ** 7 + i) for i in range(members)]
+        data["presences"] = [{"user": {"id": str(guild_id * 10 ** 7 + i)}, "status": "online", "client_status": {"desktop": "online"},
+                              "activities": [{"name": "Valorant", "type": 0}]} for i in range(0, members, 2)]
+    return data
+
+
+def measure(profile, guilds, members, interactions, cache_size):
+    gc.collect()
+    tracemalloc.start()
+    options = client_options(profile)
+    state = ConnectionState(dispatch=lambda *args, **kwargs: None, handlers={}, hooks={}, http=None, **options)
+    with_members = options["intents"].members
+    cache = MemberCache(cache_size)
+    loaded = [state._add_guild_from_data(guild_payload(guild_id, members, with_members)) for guild_id in range(1, guilds + 1)]
+    # every interaction carries the member who used it, which is all the
+    # minimal profile ever sees of the member list
+    random.seed(interactions)
+    for _ in range(interactions):
+        guild = random.choice(loaded)
+        cache.add(discord.Member(data=member_payload(guild.id * 10 ** 7 + random.randrange(members)), guild=guild, state=state))
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    cached = sum(len(guild._members) for guild in loaded)
+    return current, cached, len(cache)
+
+
+if __name__ == "__main__":
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    members = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    interactions = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    for profile in ("all", "minimal"):
+        current, cached, recent = measure(profile, guilds, members, interactions, 1000)
+        print(f"{profile:<8} {guilds} guilds x {members} members: {current / 2 ** 20:8.1f} MiB, "
+              f"{cached} members in the guild cache, {recent} in the LRU")
@@ -0,0 +1,68 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from question_bank import QuestionBank, SeenSet, sample
+
+CATEGORIES = ["geography", "history", "science", "sports", "movies", "music", "gaming", "general"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+def write_bank(file_path, count):
+    random.seed(count)
+    with open(file_path, "w") as file:
+        for i in range(count):
+            file.write(json.dumps({"question": f"Question number {i}?", "options": [f"Option {j}" for j in range(4)],
+                                   "answer": "Option 0", "category": random.choice(CATEGORIES),
+                                   "difficulty": random.choice(DIFFICULTIES)}) + "\n")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    players = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    per_player = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    with tempfile.TemporaryDirectory() as root:
+        file_path = os.path.join(root, "questions.jsonl")
+        write_bank(file_path, count)
+        bank = QuestionBank(file_path)
+
+        start = time.perf_counter()
+        bank.load()
+        built = time.perf_counter() - start
+        bank.close()
+        tracemalloc.start()
+        bank.load()
+        index_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{count} questions ({os.path.getsize(file_path) / 2 ** 20:.1f} MiB file): index built in {built:.2f} s, "
+              f"{index_memory / 2 ** 20:.1f} MiB of offsets and tag indexes")
+
+        start = time.perf_counter()
+        for _ in range(10000):
+            bank[random.randrange(count)]
+        print(f"random question read: {(time.perf_counter() - start) / 10000 * 1e6:.1f} us")
+
+        pool = bank.pool("science", "hard")
+        tracemalloc.start()
+        seen = [SeenSet() for _ in range(players)]
+        start = time.perf_counter()
+        for player in seen:
+            sample(pool, player, per_player)
+        sampled = time.perf_counter() - start
+        seen_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{players} players x {per_player} questions from a {len(pool)} question pool: "
+              f"{sampled / (players * per_player) * 1e6:.2f} us per question, {seen_memory / players:.0f} B per player "
+              f"(a dense bitmap would be {(count + 7) // 8} B)")
+
+        small = bank.pool("music", "easy")
+        player = SeenSet()
+        start = time.perf_counter()
+        picked = [number for _ in range(len(small) // 10) for number in sample(small, player, 10)]
+        print(f"{len(picked)} draws from a {len(small)} question pool: {len(set(picked))} distinct, "
+              f"{(time.perf_counter() - start) / len(picked) * 1e6:.2f} us per question")
+        bank.close()
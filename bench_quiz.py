@@ -0,0 +1,52 @@
+import random
+import sys
+import time
+import tracemalloc
+
+from quiz_engine import QuizEngine
+
+
+def run(sessions, channel_players, questions=5):
+    random.seed(sessions)
+    engine = QuizEngine(question_seconds=20, now=0.0)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(sessions):
+        if i % 10:
+            engine.start(("user", 1, i), i, solo=True, count=questions, now=0.0)
+        else:
+            engine.start(("channel", 1, i), i, solo=False, count=questions, now=0.0)
+    started = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    answers = 0
+    start = time.perf_counter()
+    for step in range(questions):
+        now = step * 20 + 5.0
+        for key, session in list(engine.sessions.items()):
+            players = (session.owner_id,) if session.solo else range(key[2] * 1000, key[2] * 1000 + channel_players)
+            for user_id in players:
+                engine.answer(key, user_id, session.index, random.randrange(4), now=now)
+                answers += 1
+            if session.solo:
+                if engine.next_question(key, now=now) is None:
+                    engine.finish(key)
+        # channel quizzes move on when their timer runs out
+        for session in engine.expire(now=step * 20 + 20.0):
+            if engine.next_question(session.key, now=step * 20 + 20.0) is None:
+                engine.finish(session.key)
+    answered = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine.expire(now=questions * 20 + 40.0)
+    tick = time.perf_counter() - start
+    return started, memory, answers, answered, tick, len(engine)
+
+
+if __name__ == "__main__":
+    channel_players = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    for sessions in (1000, 10000, 50000):
+        started, memory, answers, answered, tick, left = run(sessions, channel_players)
+        print(f"{sessions:>6} sessions: start {sessions / started:9.0f}/s, {memory / sessions:6.0f} B per session, "
+              f"{answers} answers at {answers / answered:9.0f}/s, idle tick {tick * 1e3:5.2f} ms, {left} left running")
@@ -0,0 +1,47 @@
+import json
+import random
+import sys
+import time
+
+from ratings import RatingEngine
+
+
+def make_records(matches, teams, per_day=200):
+    random.seed(matches)
+    names = [f"team-{i}" for i in range(teams)]
+    records = []
+    for i in range(matches):
+        field = random.sample(names, random.choice((2, 2, 2, 8)))
+        records.append({"winner": field[0], "losers": field[1:], "time": i * 86400 // per_day})
+    return records
+
+
+def check(engine, records):
+    # the live path: load the saved state, apply one result, save it again
+    state = engine.new_state()
+    for record in records:
+        state = json.loads(json.dumps(engine.snapshot(engine.apply(state, record))))
+    live = state["ratings"]
+    full = engine.ratings(engine.recompute(records))
+    return max(abs(live[team]["rating"] - full[team]["rating"]) + abs(live[team]["rd"] - full[team]["rd"]) for team in full)
+
+
+if __name__ == "__main__":
+    matches = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    teams = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    records = make_records(matches, teams)
+    for system in ("elo", "glicko2"):
+        engine = RatingEngine(system)
+        difference = check(engine, make_records(300, 40, per_day=20))
+        assert difference < 1e-9, f"incremental and recompute ratings differ by {difference}"
+        start = time.perf_counter()
+        ratings = engine.ratings(engine.recompute(records))
+        recompute = time.perf_counter() - start
+        state = engine.new_state()
+        start = time.perf_counter()
+        for record in records[:2000]:
+            engine.ratings(engine.apply(state, record))
+        per_result = (time.perf_counter() - start) / min(2000, len(records))
+        print(f"{system:<8} full recompute of {matches} matches / {len(ratings)} teams: {recompute:6.2f} s, "
+              f"incremental update: {per_result * 1e6:7.1f} us per result, "
+              f"incremental vs recompute difference on 300 matches: {difference:.1e}")
@@ -1,7 +1,9 @@
 import discord
 from discord.ext import commands, tasks
+from discord import app_commands
 from discord.ui import *
 import asyncio
+import io
 import json
 import os
 import random
@@ -9,7 +11,6 @@ import time
 import datetime
 import uuid
 from dotenv import load_dotenv
-from PIL import Image, ImageDraw, ImageFont
 import qrcode
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
@@ -21,9 +22,28 @@ from reportlab.lib import colors
 from googleapiclient.discovery import build
 from google.oauth2.service_account import Credentials
 import razorpay  
+from search_index import TeamIndex
+from registration_guard import RegistrationGuard, identity_key
+from brackets import create_bracket, open_matches, report, seed_teams, standings, swiss_finish, swiss_next_round
+from ratings import RatingEngine, append_match, load_matches
+from cards import CardRenderer
+from checkin import TimingWheel, generate_otp, otp_matches
+from scheduler import EventScheduler
+from storage import GuildStorage, load_json, save_json, update_json
+from member_cache import MemberCache, client_options
+from quiz_engine import QuizEngine
+from question_bank import QuestionBank
 
 leaderboard_path = "weekly_lb.json"
 monthly_leaderboard_path = "monthly_lb.json"
+bans_path = "bans.json"
+matches_path = "matches.jsonl"
+ratings_path = "ratings.json"
+schedule_path = "schedule.json"
+tournaments_path = "tournaments.json"
+guild_config_path = "config.json"
+quiz_leaderboard_path = "quiz_lb.json"
+tournament_guilds_path = "tournament_guilds.json"
 
 with open("config.json", "r") as config_file:
     config = json.load(config_file)
@@ -35,46 +55,150 @@ SERVICE_ACCOUNT_FILE = config["google_service_account_file"]
 SCOPES = config["google_sheets_scopes"]
 
 
-bot = commands.Bot(intents=discord.Intents.all(), command_prefix='s!')
+# one process can run every shard (AutoShardedBot picks the count), or several
+# processes can each run a slice by setting shard_count and shard_ids; they
+# share the data directory, where every guild has its own partition
+sharding = config.get("sharding", {})
+# "all" caches every member and presence, "minimal" only keeps the members who
+# recently used the bot in member_cache
+bot = commands.AutoShardedBot(command_prefix='s!', shard_count=sharding.get("shard_count"), shard_ids=sharding.get("shard_ids"), **client_options(config.get("intents", "all")))
+member_cache = MemberCache(config.get("member_cache_size", 1000))
+storage = GuildStorage(config.get("data_dir", "data"))
 razorpay_client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
-
-def load_json(file_path):
-    try:
-        if os.path.exists(file_path):
-            with open(file_path, "r") as file:
-                return json.load(file)
-        return {}
-    except json.JSONDecodeError:
-        return {}
+rating_engine = RatingEngine(**config.get("ratings", {}))
+card_renderer = CardRenderer(logo_path="logo.png", background_path=config.get("card_background"), font_path=config.get("card_font"))
+card_rows = config.get("card_rows", 10)
+checkin_minutes = config.get("checkin_minutes", 15)
+checkin_grace_minutes = config.get("checkin_grace_minutes", 5)
+reminder_minutes = config.get("reminder_minutes", [60, 10])
+close_registrations_minutes = config.get("close_registrations_minutes", 60)
+leaderboard_reset_hours = {"weekly": 168, "monthly": 720}
+
+if config.get("legacy_guild_id"):
+    storage.migrate(config["legacy_guild_id"], [tournaments_path, leaderboard_path, monthly_leaderboard_path, bans_path, matches_path, ratings_path, schedule_path])
+
+def guild_path(guild_id, name):
+    return storage.path(guild_id, name)
+
+def guild_config(guild_id):
+    # defaults come from config["guilds"][guild id], e.g.
+    # {"mod_role_id": 123, "sheet_share_email": "a@b.com"}; /setup overrides them
+    settings = {"mod_role_id": None, "sheet_share_email": None}
+    settings.update(config.get("guilds", {}).get(str(guild_id), {}))
+    settings.update(load_json(guild_path(guild_id, guild_config_path)))
+    return settings
+
+team_indexes = {}
+registration_guards = {}
+checkin_wheel = TimingWheel(tick=1, now=time.time())
+question_bank = QuestionBank(config.get("question_bank", "questions.jsonl"))
+quiz_engine = QuizEngine(question_bank, question_seconds=config.get("quiz_question_seconds", 20))
+quiz_messages = {}
+quiz_views = {}
+scheduler = EventScheduler(lambda guild_id: guild_path(guild_id, schedule_path))
+
+def get_team_index(guild_id):
+    if guild_id not in team_indexes:
+        team_indexes[guild_id] = TeamIndex()
+        team_indexes[guild_id].build(load_json(guild_path(guild_id, tournaments_path)))
+    return team_indexes[guild_id]
+
+def get_registration_guard(guild_id):
+    if guild_id not in registration_guards:
+        registration_guards[guild_id] = RegistrationGuard()
+        registration_guards[guild_id].build(load_json(guild_path(guild_id, tournaments_path)), load_json(guild_path(guild_id, bans_path)))
+    return registration_guards[guild_id]
+
+def register_tournament_guilds(tournament_guilds):
+    # tournament id -> guild ids, shared by every shard process: a /checkin
+    # sent by DM reaches shard 0, which may not own the tournament's guild
+    def update(index):
+        for tournament_id, guild_id in tournament_guilds:
+            guild_ids = index.setdefault(str(tournament_id), [])
+            if guild_id not in guild_ids:
+                guild_ids.append(guild_id)
+    update_json(storage.shared_path(tournament_guilds_path), update)
+
+def load_guild_state(guild_id):
+    # build the in-memory indexes up front: they read tournaments.json, which
+    # must not happen later from inside an update_json callback
+    get_team_index(guild_id)
+    get_registration_guard(guild_id)
+    for tournament_id, tournament_data in load_json(guild_path(guild_id, tournaments_path)).items():
+        for secret_id, team in tournament_data["teams"].items():
+            if team["otp_expiry"] and not team["verified"] and team["registration"] == "Approved":
+                checkin_wheel.schedule((guild_id, tournament_id, secret_id), team["otp_expiry"])
+    scheduler.load(guild_id)
+    # tournaments created before the scheduler existed, or whose events were
+    # lost, still get their reminders, auto-close and check-in
+    for tournament_id, tournament_data in load_json(guild_path(guild_id, tournaments_path)).items():
+        if tournament_data["winner"] is None and tournament_data.get("tournament_time"):
+            schedule_tournament_events(guild_id, tournament_id, tournament_data["tournament_time"])
+    for timeframe, hours in leaderboard_reset_hours.items():
+        if not scheduler.has("leaderboard_reset", {"guild_id": guild_id, "timeframe": timeframe}):
+            scheduler.schedule(int(time.time()) + hours * 3600, "leaderboard_reset", {"guild_id": guild_id, "timeframe": timeframe})
+    return [(tournament_id, guild_id) for tournament_id in load_json(guild_path(guild_id, tournaments_path))]
 
 @bot.event
 async def on_ready():
     await bot.tree.sync()
+    tournament_guilds = []
+    for guild in bot.guilds:
+        tournament_guilds += load_guild_state(guild.id)
+    register_tournament_guilds(tournament_guilds)
+    if not expire_checkins.is_running():
+        expire_checkins.start()
+    if not expire_quiz_questions.is_running():
+        expire_quiz_questions.start()
+    # index the question bank off the event loop before the first /quiz
+    try:
+        await asyncio.to_thread(question_bank.load)
+    except (OSError, ValueError) as e:
+        print(f"Error loading the question bank: {e}")
+    scheduler.start()
     print(f'Bot is ready. Logged in as {bot.user.name}')
     await bot.change_presence(activity=discord.Activity(type=discord.ActivityType.watching, name="Tournaments in Swadeshi LAN"))
 
+@bot.event
+async def on_guild_join(guild):
+    register_tournament_guilds(load_guild_state(guild.id))
+
+@bot.event
+async def on_interaction(interaction):
+    member_cache.add(interaction.user)
+
 def load_leaderboard(file_path):
-    if os.path.exists(file_path):
-        with open(file_path, "r") as lb_file:
-            return json.load(lb_file)
-    return {}
-
-def save_leaderboard(file_path, data):
-    with open(file_path, "w") as lb_file:
-        json.dump(data, lb_file, indent=4)
+    return load_json(file_path)
     
-def generate_tournament_id():
+def file_version(*paths):
+    return tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else 0 for path in paths)
+
+def record_match(guild_id, tournament_id, match_id, winner, losers):
+    record = {"tournament_id": str(tournament_id), "match_id": match_id, "time": int(time.time()), "winner": winner, "losers": losers}
+    file_path = guild_path(guild_id, matches_path)
+    append_match(file_path, record)
+    # saved before the rating settings changed (or never saved): rebuild from
+    # the history, which already holds this match
+    records = None if rating_engine.compatible(load_json(guild_path(guild_id, ratings_path))) else load_matches(file_path)
+    def update(state):
+        if records is None:
+            rating_engine.apply(state, record)
+        else:
+            state.clear()
+            state.update(rating_engine.recompute(records))
+        state.update(rating_engine.snapshot(state))
+    update_json(guild_path(guild_id, ratings_path), update)
+
+def generate_tournament_id(guild_id):
     tournament_id = random.randint(100000, 999999)
-    try:
-        with open("tournaments.json", "r") as file:
-            data = json.load(file)
-    except json.JSONDecodeError:
-        data = {} 
-    while tournament_id in data:
+    data = load_json(guild_path(guild_id, tournaments_path))
+    # unique across guilds too, so a DM /checkin finds a single guild
+    taken = load_json(storage.shared_path(tournament_guilds_path))
+    while str(tournament_id) in data or str(tournament_id) in taken:
         tournament_id = random.randint(100000, 999999)
     return tournament_id
 
-def create_google_sheet(tournament_name):
+def create_google_sheet(tournament_name, share_email):
     creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
     service = build('sheets', 'v4', credentials=creds)
     
@@ -83,31 +207,25 @@ def create_google_sheet(tournament_name):
     spreadsheet = service.spreadsheets().create(body=sheet_body).execute()
     spreadsheet_id = spreadsheet['spreadsheetId']
 
-    # Give access to your Google account
-    drive_service = build('drive', 'v3', credentials=creds)
-    permission_body = {
-        'type': 'user',  
-        'role': 'writer',  
-        'emailAddress': "swadeshilan@gmail.com"  
-    }
-    drive_service.permissions().create(
-        fileId=spreadsheet_id,
-        body=permission_body,
-        sendNotificationEmail=False
-    ).execute()
+    # Give access to the guild's Google account
+    if share_email:
+        drive_service = build('drive', 'v3', credentials=creds)
+        permission_body = {
+            'type': 'user',  
+            'role': 'writer',  
+            'emailAddress': share_email  
+        }
+        drive_service.permissions().create(
+            fileId=spreadsheet_id,
+            body=permission_body,
+            sendNotificationEmail=False
+        ).execute()
 
     return spreadsheet_id
 
-def save_tournament_data(tournament_id, data):
-    file_path = "tournaments.json"
-    if os.path.exists(file_path):
-        with open(file_path, "r") as file:
-            all_data = json.load(file)
-    else:
-        all_data = {}
-    all_data[tournament_id] = data
-    with open(file_path, "w") as file:
-        json.dump(all_data, file, indent=4)
+def save_tournament_data(guild_id, tournament_id, data):
+    update_json(guild_path(guild_id, tournaments_path), lambda all_data: all_data.update({str(tournament_id): data}))
+    register_tournament_guilds([(tournament_id, guild_id)])
 
 def generate_receipt(team, players, contact, amount, receipt_id, match_datetime, tournament_name):
     os.makedirs("receipts", exist_ok=True)
@@ -193,12 +311,23 @@ class ConfirmationView(discord.ui.View):
         self.max_teams=max_teams
         self.user_id =user_id
         self.category = category
+        self.confirmed = False
+        self.replaced = False
+
+    async def on_timeout(self):
+        # an edited registration gets a new view that owns the reservation
+        if not self.confirmed and not self.replaced:
+            get_registration_guard(self.channel.guild.id).release(self.tournament_id, int(self.user_id))
 
     @discord.ui.button(label="Confirm Registration", style=discord.ButtonStyle.success)
     async def confirm(self, interaction: discord.Interaction, button: Button):
         print(f"Interaction User ID: {interaction.user.id}, Stored User ID: {self.user_id}")
         if interaction.user.id != int(self.user_id):
             return await interaction.response.send_message("You cannot confirm someone else's registration!", ephemeral=True)
+        reason = get_registration_guard(interaction.guild.id).check(self.tournament_id, interaction.user.id, self.team_name.value, self.team_details.value.split(","), self.contact_number.value)
+        if reason:
+            return await interaction.response.send_message(f"❌ {reason}", ephemeral=True)
+        self.confirmed = True
         user_channel = self.channel
         async for message in user_channel.history(limit=10): 
             if message.author == interaction.guild.me:
@@ -250,52 +379,48 @@ class ConfirmationView(discord.ui.View):
                 waiting_embed.set_footer(text='Payment Recived Succefully', icon_url='https://cdn.discordapp.com/emojis/1221945764545167422.webp?size=28&animated=true')
                 await waiting_msg.edit(content=user.mention,embed=waiting_embed)
                 await user_channel.edit(name=f"{interaction.user.name}-paid")
-                file_path = "tournaments.json"
-                if os.path.exists(file_path):
-                    with open(file_path, "r") as file:
-                        all_data = json.load(file)
-                else:
-                    all_data = {}
-                row_number=0
-                for tournament_id, tournament_data in all_data.items():
-                    if tournament_data["spreadsheet_id"] == self.spreadsheet_id:
-                        row_number = tournament_data["registerd_teams"] + 2
-                file_path = "tournaments.json"
-                if os.path.exists(file_path):
-                    with open(file_path, "r") as file:
-                        all_data = json.load(file)
-                else:
-                    all_data = {}
+                reason = get_registration_guard(interaction.guild.id).check(self.tournament_id, interaction.user.id, self.team_name.value, self.team_details.value.split(","), self.contact_number.value)
+                if reason:
+                    get_registration_guard(interaction.guild.id).release(self.tournament_id, int(self.user_id))
+                    mod_role_id = guild_config(interaction.guild.id)["mod_role_id"]
+                    await user_channel.send(content=f"<@&{mod_role_id}>" if mod_role_id else None, embed=discord.Embed(description=f"❌ {reason} A moderator will refund your payment.", color=15548997))
+                    break
+                team_index = get_team_index(interaction.guild.id)
+                guard = get_registration_guard(interaction.guild.id)
+                def add_paid_team(all_data):
+                    for tournament_id, tournament_data in all_data.items():
+                        if tournament_data["spreadsheet_id"] == self.spreadsheet_id:
+                            tournament_data["teams"][secret_id] ={
+                                "team_name": self.team_name.value,
+                                "players": self.team_details.value.split(","),
+                                "contact_number": self.contact_number.value,
+                                "registration" : "Paid",
+                                "verified": False,
+                                "otp": None,
+                                "otp_expiry": None,                     
+                                "team_id": interaction.user.id
+                            }
+                            team_index.add_team(tournament_id, secret_id, tournament_data["teams"][secret_id], tournament_data["tournament_name"])
+                            guard.add_team(tournament_id, secret_id, tournament_data["teams"][secret_id])
+                            return tournament_data["registerd_teams"] + 2
+                    return 0
+
+                row_number = update_json(guild_path(interaction.guild.id, tournaments_path), add_paid_team)
                 role = discord.utils.get(interaction.guild.roles, name=f"{self.tournament_id}-registerd")
                 approval_view = ApprovalButtons(user, self.spreadsheet_id, row_number, role,self.channel,secret_id)
                 embbed = discord.Embed(title="**Mod Approval**",description=f"{user.mention} a moderator will check and approve your applcation before final Registration. Please wait.")
-                await user_channel.send(content="<@&1238841033341665281>", embed=embbed,view=approval_view)
-
-                for tournament_id, tournament_data in all_data.items():
-                    if tournament_data["spreadsheet_id"] == self.spreadsheet_id:
-                        
-                        tournament_data["teams"][secret_id] ={
-                            "team_name": self.team_name.value,
-                            "players": self.team_details.value.split(","),
-                            "contact_number": self.contact_number.value,
-                            "registration" : "Paid",
-                            "verified": False,
-                            "otp": None,
-                            "otp_expiry": None,                     
-                            "team_id": interaction.user.id
-                        }
-                        break
-
-                with open(file_path, "w") as file:
-                    json.dump(all_data, file, indent=4)
+                mod_role_id = guild_config(interaction.guild.id)["mod_role_id"]
+                await user_channel.send(content=f"<@&{mod_role_id}>" if mod_role_id else None, embed=embbed,view=approval_view)
                 break
+        else:
+            get_registration_guard(interaction.guild.id).release(self.tournament_id, int(self.user_id))
 
     @discord.ui.button(label="Edit Details", style=discord.ButtonStyle.primary)
     async def edit(self, interaction: discord.Interaction, button: Button):
         if interaction.user.id != int(self.user_id):
 
             return await interaction.response.send_message("You cannot edit someone else's details!", ephemeral=True)
-        await interaction.response.send_modal(EditRegistrationModal(self.tournament_name, self.entry_fee, self.spreadsheet_id, self.category, self.tournament_id, self.msg, self.max_teams,channel=self.channel, user_id=self.user_id))
+        await interaction.response.send_modal(EditRegistrationModal(self.tournament_name, self.entry_fee, self.spreadsheet_id, self.category, self.tournament_id, self.msg, self.max_teams,channel=self.channel, user_id=self.user_id, confirmation_view=self))
 class CloseRegistration(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
@@ -321,33 +446,25 @@ class ApprovalButtons(discord.ui.View):
         await interaction.response.send_message(embed=embed)
         await self.update_spreadsheet("Approved")
         await self.user.add_roles(self.role)
-        file_path = "tournaments.json"
-        if os.path.exists(file_path):
-            with open(file_path, "r") as file:
-                all_data = json.load(file)
-        else:
-            all_data = {}
-        tournament_name =  None
-        info_channel = None
-        timestamp = 0
-        for tournament_id, tournament_data in all_data.items():
-            if tournament_data["spreadsheet_id"] == self.spreadsheet_id:
-                tournament_data["registerd_teams"] += 1
-                tournament_name = tournament_data["tournament_name"]
-                info_channel = tournament_data["info_channel_id"]
-                amount = tournament_data["entry_fee"]
-                timestamp = tournament_data["tournament_time"]
-                for secret_id, team in tournament_data["teams"].items():
-                    if team["team_id"] == self.user.id:  
-                        team["registration"] = "Approved"
-                        name=team["team_name"]  
-                        players=team["players"]
-                        contact=team["contact_number"]
-                        receipt_id=secret_id
-                        
-                        break
-        with open(file_path, "w") as file:
-            json.dump(all_data, file, indent=4) 
+        team_index = get_team_index(interaction.guild.id)
+        def approve_team(all_data):
+            for tournament_id, tournament_data in all_data.items():
+                if tournament_data["spreadsheet_id"] == self.spreadsheet_id:
+                    tournament_data["registerd_teams"] += 1
+                    for secret_id, team in tournament_data["teams"].items():
+                        if team["team_id"] == self.user.id:  
+                            team["registration"] = "Approved"
+                            team_index.add_team(tournament_id, secret_id, team, tournament_data["tournament_name"])
+                            return tournament_data, secret_id, team
+        tournament_data, secret_id, team = update_json(guild_path(interaction.guild.id, tournaments_path), approve_team)
+        tournament_name = tournament_data["tournament_name"]
+        info_channel = tournament_data["info_channel_id"]
+        amount = tournament_data["entry_fee"]
+        timestamp = tournament_data["tournament_time"]
+        name=team["team_name"]  
+        players=team["players"]
+        contact=team["contact_number"]
+        receipt_id=secret_id
         dt = datetime.datetime.fromtimestamp(timestamp)
         match_datetime = dt.strftime("%d-%m-%Y %I:%M %p")    
         
@@ -370,20 +487,18 @@ class ApprovalButtons(discord.ui.View):
         embed = discord.Embed(description=f"{interaction.user.name} responded with **'Reject'**")
         await interaction.response.send_message(embed=embed)
         await self.update_spreadsheet("Rejected")
-        file_path = "tournaments.json"
-        if os.path.exists(file_path):
-            with open(file_path, "r") as file:
-                all_data = json.load(file)
-        else:
-            all_data = {}
-        for tournament_id, tournament_data in all_data.items():
-            if tournament_data["spreadsheet_id"] == self.spreadsheet_id:
-                for secret_id, team in tournament_data["teams"].items():
-                    if team["team_id"] == self.user.id:  
-                        team["registration"] = "Rejected"  
-                        break
-        with open(file_path, "w") as file:
-            json.dump(all_data, file, indent=4)
+        team_index = get_team_index(interaction.guild.id)
+        guard = get_registration_guard(interaction.guild.id)
+        def reject_team(all_data):
+            for tournament_id, tournament_data in all_data.items():
+                if tournament_data["spreadsheet_id"] == self.spreadsheet_id:
+                    for secret_id, team in tournament_data["teams"].items():
+                        if team["team_id"] == self.user.id:  
+                            team["registration"] = "Rejected"  
+                            guard.remove_team(tournament_id, secret_id, team)
+                            team_index.add_team(tournament_id, secret_id, team, tournament_data["tournament_name"])
+                            break
+        update_json(guild_path(interaction.guild.id, tournaments_path), reject_team)
         embed = discord.Embed(title="**Rejected**",description=f"{interaction.user.mention} have rejected your Application. Please Contact Staff For More information\n**⚠ YOUR TEAM NUMBER IS YOUR LEADERS'S DISCORD ID**",color=15548997)  
         await interaction.followup.send(content=self.user.mention,embed=embed) 
         await self.channel.edit(name=f"{self.user.mention}-rejected")
@@ -426,44 +541,51 @@ class RegistrationModal(discord.ui.Modal):
         self.add_item(self.contact_number)
 
     async def on_submit(self, interaction: discord.Interaction):
-        file_path = "tournaments.json"
-        if os.path.exists(file_path):
-            with open(file_path, "r") as file:
-                 all_data = json.load(file)
-        else:
-            all_data = {}
-        registred_teams=0
-        for tournament_id, tournament_data in all_data.items():
-            if tournament_data["spreadsheet_id"] == self.spreadsheet_id:
-                registred_teams = tournament_data["registerd_teams"]
-        if registred_teams == self.max_teams - 1:
+        reason = get_registration_guard(interaction.guild.id).reserve(self.tournament_id, interaction.user.id, self.team_name.value, self.team_details.value.split(","), self.contact_number.value)
+        if reason:
+            await interaction.response.send_message(f"❌ {reason}", ephemeral=True)
+            return
+        # the ConfirmationView releases the reservation from here on; until it
+        # is sent, any failure has to release it or the user stays locked out
+        try:
+            file_path = guild_path(interaction.guild.id, tournaments_path)
+            all_data = load_json(file_path)
+            registred_teams=0
             for tournament_id, tournament_data in all_data.items():
                 if tournament_data["spreadsheet_id"] == self.spreadsheet_id:
-                    tournament_data["Registartion Closed"]
-            await self.msg.edit(view=CloseRegistration())
-
-        user_id = str(interaction.user.id)
-        user = interaction.user
-        user_channel = await self.category.create_text_channel(
-            f"{interaction.user.name}-registration",
-            overwrites={
-                interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
-                interaction.user: discord.PermissionOverwrite(read_messages=True)
-            }
-        )
-        await interaction.response.send_message(f"Complete Your Registration in <#{user_channel.id}>", ephemeral=True)
-        embed = discord.Embed(title="Your Registration Details",
-                        description=f"```Name: {self.name.value}\nAge: {self.age.value}\nTeam: {self.team_name.value}\nMembers: {self.team_details.value}\nContact: {self.contact_number.value}```",
-                        colour=0xffffff, timestamp=datetime.datetime.now())
-        embed.set_author(name="Swadeshi LAN",
-            icon_url=interaction.guild.icon.url)
-        embed.set_thumbnail(url=f"{interaction.guild.icon.url}")
-        embed.set_footer(text="Made by Scott with ❤")
-        await user_channel.send(content=f"<@{user_id}>", embed=embed, view=ConfirmationView(self.tournament_name, self.entry_fee, self.spreadsheet_id, self.category, self.tournament_id, self.msg, self.max_teams,user_channel,int(user_id), self.name, self.age, self.team_name, self.team_details, self.contact_number))
+                    registred_teams = tournament_data["registerd_teams"]
+            if registred_teams == self.max_teams - 1:
+                for tournament_id, tournament_data in all_data.items():
+                    if tournament_data["spreadsheet_id"] == self.spreadsheet_id:
+                        tournament_data["Registartion Closed"]
+                await self.msg.edit(view=CloseRegistration())
+
+            user_id = str(interaction.user.id)
+            user = interaction.user
+            user_channel = await self.category.create_text_channel(
+                f"{interaction.user.name}-registration",
+                overwrites={
+                    interaction.guild.default_role: discord.PermissionOverwrite(read_messages=False),
+                    interaction.user: discord.PermissionOverwrite(read_messages=True)
+                }
+            )
+            await interaction.response.send_message(f"Complete Your Registration in <#{user_channel.id}>", ephemeral=True)
+            embed = discord.Embed(title="Your Registration Details",
+                            description=f"```Name: {self.name.value}\nAge: {self.age.value}\nTeam: {self.team_name.value}\nMembers: {self.team_details.value}\nContact: {self.contact_number.value}```",
+                            colour=0xffffff, timestamp=datetime.datetime.now())
+            embed.set_author(name="Swadeshi LAN",
+                icon_url=interaction.guild.icon.url)
+            embed.set_thumbnail(url=f"{interaction.guild.icon.url}")
+            embed.set_footer(text="Made by Scott with ❤")
+            await user_channel.send(content=f"<@{user_id}>", embed=embed, view=ConfirmationView(self.tournament_name, self.entry_fee, self.spreadsheet_id, self.category, self.tournament_id, self.msg, self.max_teams,user_channel,int(user_id), self.name, self.age, self.team_name, self.team_details, self.contact_number))
+        except Exception:
+            get_registration_guard(interaction.guild.id).release(self.tournament_id, interaction.user.id)
+            raise
 
 class EditRegistrationModal(discord.ui.Modal):
-    def __init__(self, tournament_name, entry_fee, spreadsheet_id, category, tournament_id, msg, max_teams,channel ,user_id):
+    def __init__(self, tournament_name, entry_fee, spreadsheet_id, category, tournament_id, msg, max_teams,channel ,user_id, confirmation_view):
         super().__init__(title=f"Edit Your Details")
+        self.confirmation_view = confirmation_view
         self.tournament_name = tournament_name
         self.entry_fee = entry_fee
         self.spreadsheet_id = spreadsheet_id
@@ -487,21 +609,35 @@ class EditRegistrationModal(discord.ui.Modal):
         self.add_item(self.contact_number)
 
     async def on_submit(self, interaction: discord.Interaction):
-        user_id = self.user_id
-        user = interaction.user
-        user_channel = self.channel
-        async for message in user_channel.history(limit=10): 
-            if message.author == interaction.guild.me:  
-                embed = discord.Embed(title="Your Registration Details",
-                                description=f"```Name: {self.name.value}\nAge: {self.age.value}\nTeam: {self.team_name.value}\nMembers: {self.team_details.value}\nContact: {self.contact_number.value}```",
-                                colour=0xffffff, timestamp=datetime.datetime.now())
-                embed.set_author(name="Swadeshi LAN",
-                    icon_url=interaction.guild.icon.url)
-                embed.set_thumbnail(url=f"{interaction.guild.icon.url}")
-                embed.set_footer(text="Made by Scott with ❤")
-                embbed = discord.Embed(description=f"{interaction.user.name} responded with **'Edit Details'**")
-                await interaction.response.send_message(embed=embbed)
-                await message.edit(content=f"<@{user_id}>", embed=embed, view=ConfirmationView(self.tournament_name, self.entry_fee, self.spreadsheet_id, self.category, self.tournament_id, self.msg, self.max_teams,user_channel,int(user_id), self.name, self.age, self.team_name,self.team_details,self.contact_number))
+        reason = get_registration_guard(interaction.guild.id).reserve(self.tournament_id, int(self.user_id), self.team_name.value, self.team_details.value.split(","), self.contact_number.value, replace=True)
+        if reason:
+            await interaction.response.send_message(f"❌ {reason}", ephemeral=True)
+            return
+        self.confirmation_view.replaced = True
+        self.confirmation_view.stop()
+        # the old view is stopped, so until the new one is on the message
+        # nothing else will release the reservation
+        attached = False
+        try:
+            user_id = self.user_id
+            user = interaction.user
+            user_channel = self.channel
+            async for message in user_channel.history(limit=10): 
+                if message.author == interaction.guild.me:  
+                    embed = discord.Embed(title="Your Registration Details",
+                                    description=f"```Name: {self.name.value}\nAge: {self.age.value}\nTeam: {self.team_name.value}\nMembers: {self.team_details.value}\nContact: {self.contact_number.value}```",
+                                    colour=0xffffff, timestamp=datetime.datetime.now())
+                    embed.set_author(name="Swadeshi LAN",
+                        icon_url=interaction.guild.icon.url)
+                    embed.set_thumbnail(url=f"{interaction.guild.icon.url}")
+                    embed.set_footer(text="Made by Scott with ❤")
+                    embbed = discord.Embed(description=f"{interaction.user.name} responded with **'Edit Details'**")
+                    await interaction.response.send_message(embed=embbed)
+                    await message.edit(content=f"<@{user_id}>", embed=embed, view=ConfirmationView(self.tournament_name, self.entry_fee, self.spreadsheet_id, self.category, self.tournament_id, self.msg, self.max_teams,user_channel,int(user_id), self.name, self.age, self.team_name,self.team_details,self.contact_number))
+                    attached = True
+        finally:
+            if not attached:
+                get_registration_guard(interaction.guild.id).release(self.tournament_id, int(self.user_id))
         
 
 class RegisterButton(discord.ui.View):
@@ -527,6 +663,7 @@ class RegisterButton(discord.ui.View):
 
 
 @bot.tree.command(name="about_us", description="Shows About Swadeshi LAN")
+@app_commands.guild_only()
 async def about_us(interaction: discord.Interaction):
     embed = discord.Embed(title="ABOUT SWADESHI LAN",
                       description="𝙒𝙚 𝙖𝙧𝙚 𝙜𝙖𝙢𝙚𝙧𝙨 𝙟𝙪𝙨𝙩 𝙡𝙞𝙠𝙚 𝙮𝙤𝙪.\n\n➝𝙊𝙪𝙧 𝙖𝙞𝙢 𝙞𝙨 𝙩𝙤 𝙘𝙝𝙖𝙣𝙜𝙚 𝙩𝙝𝙚 𝙥𝙚𝙧𝙨𝙥𝙚𝙘𝙩𝙞𝙫𝙚 𝙤𝙛 𝙀-𝙨𝙥𝙤𝙧𝙩𝙨 𝙞𝙣 𝙄𝙣𝙙𝙞𝙖. 𝙃𝙪𝙣𝙙𝙧𝙚𝙙𝙨 𝙤𝙛 𝙩𝙤𝙪𝙧𝙣𝙖𝙢𝙚𝙣𝙩𝙨 𝙩𝙖𝙠𝙚 𝙥𝙡𝙖𝙘𝙚 𝙚𝙖𝙘𝙝 𝙙𝙖𝙮 𝙞𝙣 𝙫𝙖𝙧𝙞𝙤𝙪𝙨 𝙥𝙡𝙖𝙘𝙚𝙨 𝙗𝙪𝙩 𝙬𝙝𝙖𝙩 𝙖𝙗𝙤𝙪𝙩 𝙪𝙨? 𝙏𝙝𝙚𝙧𝙚 𝙖𝙧𝙚 𝙨𝙚𝙫𝙚𝙧𝙖𝙡 𝙜𝙖𝙢𝙚𝙧𝙨 𝙤𝙣 𝙞𝙣𝙩𝙚𝙧𝙣𝙚𝙩 𝙞𝙣 𝙄𝙣𝙙𝙞𝙖 𝙗𝙪𝙩 𝙬𝙝𝙚𝙧𝙚'𝙨 𝙩𝙝𝙚 𝙀-𝙨𝙥𝙤𝙧𝙩𝙨 𝙘𝙤𝙢𝙢𝙪𝙣𝙞𝙩𝙮 𝙬𝙝𝙤 𝙖𝙘𝙩𝙪𝙖𝙡𝙡𝙮 𝙨𝙪𝙥𝙥𝙤𝙧𝙩 𝙦𝙪𝙖𝙡𝙞𝙩𝙮 𝙜𝙖𝙢𝙞𝙣𝙜 𝙚𝙭𝙥𝙚𝙧𝙞𝙚𝙣𝙘𝙚 𝙖𝙣𝙙 𝙥𝙧𝙤𝙫𝙞𝙙𝙚 𝙜𝙧𝙚𝙖𝙩 𝙛𝙚𝙖𝙩𝙪𝙧𝙚𝙨.\n\n➝𝙒𝙚 𝙖𝙧𝙚 𝙝𝙚𝙧𝙚 𝙩𝙤 𝙧𝙚𝙫𝙤𝙡𝙪𝙩𝙞𝙤𝙣𝙞𝙯𝙚 𝙀-𝙨𝙥𝙤𝙧𝙩𝙨 𝙘𝙤𝙢𝙢𝙪𝙣𝙞𝙩𝙮 𝙩𝙤 𝙢𝙖𝙠𝙚 𝙞𝙩 𝙗𝙚𝙩𝙩𝙚𝙧 𝙥𝙡𝙖𝙘𝙚 𝙛𝙤𝙧 𝙚𝙫𝙚𝙧𝙮𝙤𝙣𝙚.\n\n➝𝙒𝙚 𝙥𝙧𝙤𝙫𝙞𝙙𝙚 𝙜𝙤𝙤𝙙 𝙦𝙪𝙖𝙡𝙞𝙩𝙮 𝙩𝙤𝙪𝙧𝙣𝙖𝙢𝙚𝙣𝙩𝙨 𝙤𝙛 𝙋𝘾 𝙜𝙖𝙢𝙚𝙨 𝙩𝙤 𝙚𝙫𝙚𝙧𝙮𝙤𝙣𝙚 𝙬𝙝𝙤 𝙬𝙖𝙣𝙩 𝙩𝙤 𝙖𝙘𝙝𝙞𝙚𝙫𝙚 𝙞𝙣 𝙩𝙝𝙞𝙨 𝙛𝙞𝙚𝙡𝙙. 𝙐𝙨 𝙬𝙞𝙩𝙝 𝙮𝙤𝙪𝙧 𝙨𝙪𝙥𝙥𝙤𝙧𝙩 𝙘𝙖𝙣 𝙙𝙤 𝙖𝙣𝙮𝙩𝙝𝙞𝙣𝙜 𝙞𝙣 𝙩𝙝𝙞𝙨 𝙜𝙚𝙣𝙚𝙧𝙖𝙩𝙞𝙤𝙣.\n\n➝𝙒𝙚 𝙬𝙞𝙡𝙡 𝙘𝙤𝙣𝙙𝙪𝙘𝙩 𝙨𝙚𝙫𝙚𝙧𝙖𝙡 𝙩𝙤𝙪𝙧𝙣𝙖𝙢𝙚𝙣𝙩𝙨 𝙤𝙛 𝙥𝙤𝙥𝙪𝙡𝙖𝙧 𝙁𝙋𝙎 𝘾𝙤𝙢𝙥𝙚𝙩𝙞𝙩𝙞𝙫𝙚 𝙂𝙖𝙢𝙚𝙨 𝙡𝙞𝙠𝙚 𝙑𝙖𝙡𝙤𝙧𝙖𝙣𝙩, 𝘾𝙎𝙂𝙊. 𝙊𝙫𝙚𝙧𝙬𝙖𝙩𝙘𝙝2 𝙚𝙩𝙘.\n\n𝙏𝙝𝙖𝙩'𝙨 𝙬𝙝𝙮 𝙬𝙚 𝙣𝙚𝙚𝙙 𝙮𝙤𝙪𝙧 𝙨𝙪𝙥𝙥𝙤𝙧𝙩 𝙩𝙤 𝙢𝙖𝙠𝙚 𝙩𝙝𝙞𝙨 𝙝𝙖𝙥𝙥𝙚𝙣 𝙖𝙡𝙡 𝙖𝙧𝙤𝙪𝙣𝙙 𝙤𝙪𝙧 𝙣𝙖𝙩𝙞𝙤𝙣, 𝙗𝙚𝙘𝙖𝙪𝙨𝙚 𝙩𝙤𝙜𝙚𝙩𝙝𝙚𝙧 𝙬𝙚 𝙘𝙖𝙣 𝙘𝙤𝙣𝙦𝙪𝙚𝙧 𝙩𝙝𝙚 𝙬𝙤𝙧𝙡𝙙.",
@@ -541,6 +678,7 @@ async def about_us(interaction: discord.Interaction):
 
 
 @bot.tree.command(name="rules", description="Shows Rules of Swadeshi LAN")
+@app_commands.guild_only()
 async def rules(interaction: discord.Interaction):
     embed = discord.Embed(title="RULES",
                       description="~> 𝙉𝙤 𝙛𝙞𝙜𝙝𝙩𝙞𝙣𝙜. 𝙍𝙚𝙨𝙥𝙚𝙘𝙩 𝙚𝙫𝙚𝙧𝙮𝙤𝙣𝙚 𝙚𝙦𝙪𝙖𝙡𝙡𝙮.\n~> 𝙂𝙞𝙫𝙚𝙣 𝙏𝙖𝙜 𝙖𝙣𝙙 𝙏𝙚𝙖𝙢 𝙣𝙖𝙢𝙚 𝙙𝙞𝙨𝙩𝙧𝙞𝙗𝙪𝙩𝙚𝙙 𝙗𝙮 𝙪𝙨 𝙘𝙖𝙣𝙩 𝙗𝙚 𝙘𝙝𝙖𝙣𝙜𝙚 𝙖𝙣𝙙 𝙧𝙚𝙨𝙥𝙚𝙘𝙩 𝙞𝙩.\n~> 𝙍𝙚𝙨𝙥𝙚𝙘𝙩𝙞𝙣𝙜 𝙮𝙤𝙪𝙧 𝙘𝙤𝙖𝙘𝙝 𝙙𝙚𝙘𝙞𝙨𝙞𝙤𝙣𝙨 𝙖𝙣𝙙 𝙩𝙝𝙚𝙞𝙧 𝙤𝙥𝙞𝙣𝙞𝙤𝙣.\n~> 𝙍𝙚𝙨𝙥𝙚𝙘𝙩𝙞𝙣𝙜 𝙮𝙤𝙪𝙧 𝙩𝙚𝙖𝙢 𝙖𝙣𝙙 𝙡𝙞𝙨𝙩𝙚𝙣𝙞𝙣𝙜 𝙩𝙤 𝙩𝙝𝙚𝙢.\n~> 𝘽𝙧𝙚𝙖𝙠𝙞𝙣𝙜 𝙮𝙤𝙪𝙧 𝙚𝙦𝙪𝙞𝙥𝙢𝙚𝙣𝙩 𝙬𝙞𝙡𝙡 𝙧𝙚𝙨𝙪𝙡𝙩 𝙞𝙣 𝙥𝙚𝙣𝙖𝙡𝙩𝙮 𝙖𝙣𝙙 𝙖 𝙝𝙚𝙖𝙫𝙮 𝙛𝙞𝙣𝙚. 𝙄𝙛 𝙩𝙝𝙚 𝙙𝙖𝙢𝙖𝙜𝙚 𝙞𝙨 𝙢𝙤𝙧𝙚 𝙩𝙝𝙖𝙣 𝙚𝙭𝙥𝙚𝙘𝙩𝙚𝙙 𝙩𝙝𝙚𝙣 𝙮𝙤𝙪 𝙬𝙞𝙡𝙡 𝙗𝙚 𝙙𝙞𝙨𝙦𝙪𝙖𝙡𝙞𝙛𝙞𝙚𝙙.\n~> 𝙉𝙤 𝙙𝙞𝙨𝙘𝙧𝙞𝙢𝙞𝙣𝙖𝙩𝙞𝙤𝙣 𝙨𝙝𝙤𝙪𝙡𝙙 𝙗𝙚 𝙙𝙤𝙣𝙚 𝙗𝙖𝙨𝙚𝙙 𝙤𝙣 𝙖𝙜𝙚, 𝙧𝙚𝙡𝙞𝙜𝙞𝙤𝙣, 𝙘𝙤𝙡𝙤𝙪𝙧, 𝙘𝙖𝙨𝙩𝙚.\n~> 𝙉𝙤 𝙉𝙎𝙁𝙒 𝙘𝙤𝙣𝙩𝙚𝙣𝙩, 𝙉𝙤 𝙜𝙤𝙧𝙚, 𝙉𝙤 𝙙𝙞𝙨𝙩𝙪𝙧𝙗𝙞𝙣𝙜 𝙞𝙢𝙖𝙜𝙚𝙨, 𝙚𝙩𝙘. 𝙨𝙝𝙤𝙪𝙡𝙙 𝙗𝙚 𝙥𝙤𝙨𝙩𝙚𝙙 𝙝𝙚𝙧𝙚.\n~> 𝘽𝙚 𝙧𝙚𝙨𝙥𝙚𝙘𝙩𝙛𝙪𝙡 𝙬𝙞𝙩𝙝 𝙢𝙤𝙙𝙚𝙧𝙖𝙩𝙤𝙧𝙨 𝙖𝙣𝙙 𝙛𝙚𝙡𝙡𝙤𝙬 𝙜𝙖𝙢𝙚𝙧𝙨.\n𝙃𝙤𝙥𝙚 𝙮𝙤𝙪 𝙝𝙖𝙫𝙚 𝙖 𝙛𝙪𝙣 𝙩𝙞𝙢𝙚 𝙜𝙖𝙢𝙞𝙣𝙜 𝙬𝙞𝙩𝙝 𝙐𝙎!",
@@ -555,14 +693,15 @@ async def rules(interaction: discord.Interaction):
 
 
 @bot.tree.command(name="create_tournament", description="Creates a Tournament")
+@app_commands.guild_only()
 async def create_tournament(interaction: discord.Interaction, tournament_name: str, entry_fee: int, details: str, max_teams: int, image: discord.Attachment, date_time: str):
     if not interaction.user.guild_permissions.manage_guild:
         await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
         return
     await interaction.response.defer(thinking=True)
-    tournament_id=generate_tournament_id()
+    tournament_id=generate_tournament_id(interaction.guild.id)
     category = await interaction.guild.create_category(tournament_name)
-    spreadsheet_id = create_google_sheet(tournament_name)
+    spreadsheet_id = create_google_sheet(tournament_name, guild_config(interaction.guild.id)["sheet_share_email"])
     creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
     service = build('sheets', 'v4', credentials=creds)
     values = [["Team Leader Name", "Team Leader Age", "Team Leader's Discord ID", "Team Leader's Discord Name", "Team Name", "Team Members Details", "Contact Number", "Payment","Secret ID"]]
@@ -610,98 +749,353 @@ async def create_tournament(interaction: discord.Interaction, tournament_name: s
         "spreadsheet_id": spreadsheet_id,
         "tournament_time": timestamp,
         "status": "running",
+        "max_teams": max_teams,
         "registerd_teams": 0,
         "teams": {}
     }
-    save_tournament_data(tournament_id, tournament_data)
+    save_tournament_data(interaction.guild.id, tournament_id, tournament_data)
+    schedule_tournament_events(interaction.guild.id, tournament_id, timestamp)
+
+def schedule_tournament_events(guild_id, tournament_id, timestamp):
+    events = [(timestamp - minutes * 60, "reminder", {"guild_id": guild_id, "tournament_id": str(tournament_id), "minutes": minutes}) for minutes in reminder_minutes]
+    events.append((timestamp - close_registrations_minutes * 60, "close_registrations", {"guild_id": guild_id, "tournament_id": str(tournament_id)}))
+    events.append((timestamp - checkin_minutes * 60, "checkin", {"guild_id": guild_id, "tournament_id": str(tournament_id)}))
+    for due, kind, payload in events:
+        if due > time.time() and not scheduler.has(kind, payload):
+            scheduler.schedule(due, kind, payload)
+
+@scheduler.handler("reminder")
+async def send_reminder(due, payload):
+    tournament_data = load_json(guild_path(payload["guild_id"], tournaments_path)).get(payload["tournament_id"])
+    # caught up after downtime: a reminder for a tournament that already began is pointless
+    if tournament_data is None or tournament_data["winner"] is not None or tournament_data["tournament_time"] <= time.time():
+        return
+    info_channel = bot.get_channel(tournament_data["info_channel_id"])
+    if info_channel is None:
+        return
+    role = discord.utils.get(info_channel.guild.roles, name=f"{payload['tournament_id']}-registerd")
+    embed = discord.Embed(title=f"**{tournament_data['tournament_name']}**",
+                          description=f"The tournament starts **<t:{tournament_data['tournament_time']}:R>**! Be ready and check in when your OTP arrives.",
+                          color=0xffffff)
+    embed.set_footer(text="Made by Scott with ❤")
+    await info_channel.send(content=role.mention if role else None, embed=embed)
+
+@scheduler.handler("close_registrations")
+async def scheduled_close_registrations(due, payload):
+    tournament_data = load_json(guild_path(payload["guild_id"], tournaments_path)).get(payload["tournament_id"])
+    if tournament_data is not None and tournament_data["status"] == "running":
+        await close_tournament_registrations(payload["guild_id"], payload["tournament_id"])
+
+@scheduler.handler("checkin")
+async def scheduled_checkin(due, payload):
+    tournament_data = load_json(guild_path(payload["guild_id"], tournaments_path)).get(payload["tournament_id"])
+    if tournament_data is None or tournament_data["winner"] is not None:
+        return
+    # after downtime, only open check-in if the tournament has not long started
+    if tournament_data["tournament_time"] + checkin_grace_minutes * 60 < time.time():
+        print(f"Skipping stale check-in for tournament {payload['tournament_id']}")
+        return
+    await start_checkin(payload["guild_id"], payload["tournament_id"])
+
+@scheduler.handler("leaderboard_reset")
+async def scheduled_leaderboard_reset(due, payload):
+    timeframe = payload["timeframe"]
+    if timeframe == "weekly":
+        await reset_weekly_leaderboard(payload["guild_id"])
+    else:
+        await reset_monthly_leaderboard(payload["guild_id"])
+    # after downtime only one reset is owed, the next one stays on the old cadence
+    period = leaderboard_reset_hours[timeframe] * 3600
+    next_due = due + period
+    while next_due <= time.time():
+        next_due += period
+    scheduler.schedule(next_due, "leaderboard_reset", payload)
 
 @bot.tree.command(name="close_registrations",description="Closes registrations for given tournament ID")
+@app_commands.guild_only()
 async def close_registrations(interaction: discord.Interaction, tournament_id: int):
     if not interaction.user.guild_permissions.manage_guild:
         await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
         return
-    file_path = "tournaments.json"
-    if os.path.exists(file_path):
-        with open(file_path, "r") as file:
-                all_data = json.load(file)
-    else:
-        all_data = {}
-    tournament_id_str = str(tournament_id)  
-    if tournament_id_str in all_data:
-        tournament_data = all_data[tournament_id_str]
-        msg_id = tournament_data.get("msg")
-        channel_id = tournament_data.get("channel_id")
-        msg_id = tournament_data["msg"]
+    await close_tournament_registrations(interaction.guild.id, tournament_id)
+    await interaction.response.send_message(f"Closed Registrations for tournament ID - ``{tournament_id}``", ephemeral=True)
+
+@bot.tree.command(name="setup", description="Sets the moderator role and sheet sharing email for this server")
+@app_commands.guild_only()
+async def setup(interaction: discord.Interaction, mod_role: discord.Role = None, sheet_email: str = None):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
+        return
+    def update(settings):
+        if mod_role is not None:
+            settings["mod_role_id"] = mod_role.id
+        if sheet_email is not None:
+            settings["sheet_share_email"] = sheet_email.strip() or None
+    update_json(guild_path(interaction.guild.id, guild_config_path), update)
+    current = guild_config(interaction.guild.id)
+    role_text = f"<@&{current['mod_role_id']}>" if current["mod_role_id"] else "not set"
+    await interaction.response.send_message(f"✅ Mod role: {role_text}\nSheet sharing email: ``{current['sheet_share_email'] or 'not set'}``", ephemeral=True)
+
+async def close_tournament_registrations(guild_id, tournament_id):
+    def update(all_data):
+        tournament_data = all_data.get(str(tournament_id))
+        if tournament_data is None:
+            return None
         tournament_data["status"] = "Registrations Closed"
-        channel_id = tournament_data["channel_id"]
-        channel = interaction.guild.get_channel(channel_id)
+        return tournament_data["channel_id"], tournament_data["msg"]
+    found = update_json(guild_path(guild_id, tournaments_path), update)
+    if found:
+        channel_id, msg_id = found
+        channel = bot.get_channel(channel_id)
         msg = await channel.fetch_message(msg_id)
         await msg.edit(view=CloseRegistration())
-    await interaction.response.send_message(f"Closed Registrations for tournament ID - ``{tournament_id}``", ephemeral=True)
 
 @bot.tree.command(name="winner",description="Select the winner for a tournament")
+@app_commands.guild_only()
 async def winner(interaction: discord.Interaction, tournament_id: int, winner_team_id: str):
     if not interaction.user.guild_permissions.manage_guild:
         await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
         return
-    file_path = "tournaments.json"
+    file_path = guild_path(interaction.guild.id, tournaments_path)
     try:
         winner_team_id = int(winner_team_id)
     except ValueError:
         await interaction.response.send_message("❌ Invalid team ID. Please enter a valid integer.", ephemeral=True)
         return
 
-    if os.path.exists(file_path):
-        with open(file_path, "r") as file:
-            all_data = json.load(file)
-    else:
-        all_data = {}
-
-    teams_in_tournament = []
-    winner_team_name = None
-    for tourney_id, tournament_data in all_data.items():
-        if str(tourney_id) == str(tournament_id):
-            tournament_data["winner"] = winner_team_id
-            tournament_data["status"] = f"Won By {team_name}"
-            teams_in_tournament = tournament_data.get("teams", [])
-
-    with open(file_path, "w") as file:
-        json.dump(all_data, file, indent=4)
-
-    for lb_path in [leaderboard_path, monthly_leaderboard_path]:
-        leaderboard_data = load_leaderboard(lb_path)
-
+    def set_winner(all_data):
+        tournament_data = all_data.get(str(tournament_id))
+        if tournament_data is None:
+            return {}, None, False
+        teams = tournament_data.get("teams", {})
+        winner_team_name = None
+        for team in teams.values():
+            if team["team_id"] == winner_team_id:
+                winner_team_name = team["team_name"]
+        tournament_data["winner"] = winner_team_id
+        tournament_data["status"] = f"Won By {winner_team_name}"
+        return teams, winner_team_name, "bracket" in tournament_data
+
+    teams_in_tournament, winner_team_name, has_bracket = update_json(file_path, set_winner)
+
+    def count_result(leaderboard_data):
         for team in teams_in_tournament.values():
-            team_id = team["team_id"]
             team_name = team["team_name"]
-
-            if team_id == winner_team_id:
-                winner_team_name = team_name
-
             if team_name not in leaderboard_data:
                 leaderboard_data[team_name] = {"wins": 0, "losses": 0, "points": 0, "played": 0}
-
             leaderboard_data[team_name]["played"] += 1
-        for tourney_id, tournament_data in all_data.items():
-            if str(tourney_id) == str(tournament_id):
-                tournament_data["status"] = f"Won By {team_name}"
-        if winner_team_name:
-            leaderboard_data[winner_team_name]["wins"] += 1
-
-        for team in teams_in_tournament.values():
-            team_name = team["team_name"]
             if team_name != winner_team_name:
                 leaderboard_data[team_name]["losses"] += 1
+        if winner_team_name:
+            leaderboard_data[winner_team_name]["wins"] += 1
 
         for team_name, stats in leaderboard_data.items():
             stats["points"] = stats["wins"] - stats["losses"]
 
-        save_leaderboard(lb_path, leaderboard_data)
+    for lb_path in [guild_path(interaction.guild.id, leaderboard_path), guild_path(interaction.guild.id, monthly_leaderboard_path)]:
+        update_json(lb_path, count_result)
+
+    # bracket tournaments already rated every match through /result
+    if winner_team_name and not has_bracket:
+        losers = [team["team_name"] for team in teams_in_tournament.values() if team["registration"] == "Approved" and team["team_name"] != winner_team_name]
+        record_match(interaction.guild.id, tournament_id, "final", winner_team_name, losers)
     await interaction.response.send_message(f"Winner for tournament ID - ``{tournament_id}`` is **{winner_team_name}**!")
+
+@bot.tree.command(name="find", description="Find which tournament a team or player is in")
+@app_commands.guild_only()
+@app_commands.default_permissions(manage_guild=True)
+async def find(interaction: discord.Interaction, query: str):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
+        return
+    results = get_team_index(interaction.guild.id).search(query, limit=10)
+    if not results:
+        await interaction.response.send_message(f"❌ No team or player found for ``{query}``.", ephemeral=True)
+        return
+    embed = discord.Embed(title=f"Search results for {query}", color=0xffffff, timestamp=datetime.datetime.now())
+    for secret_id in results:
+        tournament_id, tournament_name, team = get_team_index(interaction.guild.id).get(secret_id)
+        embed.add_field(
+            name=f"{team['team_name']} ({tournament_name} - ``{tournament_id}``)",
+            value=f"Players: {', '.join(team['players'])}\nContact: {team['contact_number']}\nLeader: <@{team['team_id']}>\nStatus: **{team['registration']}**\nTeam ID: ``{secret_id}``",
+            inline=False
+        )
+    embed.set_author(name="Swadeshi LAN",
+        icon_url=interaction.guild.icon.url)
+    embed.set_footer(text="Made by Scott with ❤")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@find.autocomplete("query")
+async def find_autocomplete(interaction: discord.Interaction, current: str):
+    if not interaction.user.guild_permissions.manage_guild:
+        return []
+    choices = []
+    # the value is the team name, never the secret id: it is the team's
+    # private team ID and receipt ID
+    for secret_id in get_team_index(interaction.guild.id).search(current, limit=25):
+        tournament_id, tournament_name, team = get_team_index(interaction.guild.id).get(secret_id)
+        choices.append(app_commands.Choice(name=f"{team['team_name']} - {tournament_name}"[:100], value=team["team_name"][:100]))
+    return choices
+
+def bracket_embed(interaction, tournament_id, tournament_data):
+    bracket = tournament_data["bracket"]
+    teams = tournament_data["teams"]
+    formats = {"single": "Single Elimination", "double": "Double Elimination", "swiss": "Swiss"}
+    embed = discord.Embed(title=f"{tournament_data['tournament_name']} - {formats[bracket['format']]}", color=0xffffff, timestamp=datetime.datetime.now())
+    if bracket["champion"]:
+        embed.description = f"🏆 **{teams[bracket['champion']]['team_name']}** won the tournament!"
+    elif bracket["format"] == "swiss":
+        embed.description = f"Round **{bracket['round']}** of **{bracket['rounds']}**"
+    matches = open_matches(bracket)
+    for match in matches[:24]:
+        a, b = match["teams"]
+        embed.add_field(name=f"``{match['id']}``", value=f"**{teams[a]['team_name']}** (``{teams[a]['team_id']}``) vs **{teams[b]['team_name']}** (``{teams[b]['team_id']}``)", inline=True)
+    if len(matches) > 24:
+        embed.add_field(name="More matches", value=f"+{len(matches) - 24} more matches", inline=False)
+    embed.set_author(name="Swadeshi LAN",
+        icon_url=interaction.guild.icon.url)
+    embed.set_footer(text=f"Made by Scott with ❤ | Tournament ID {tournament_id}")
+    return embed
+
+@bot.tree.command(name="bracket", description="Creates a bracket for a tournament seeded by leaderboard points")
+@app_commands.guild_only()
+@app_commands.choices(bracket_format=[
+    app_commands.Choice(name="Single Elimination", value="single"),
+    app_commands.Choice(name="Double Elimination", value="double"),
+    app_commands.Choice(name="Swiss", value="swiss"),
+])
+async def bracket(interaction: discord.Interaction, tournament_id: int, bracket_format: str, swiss_rounds: int = 0, reset: bool = False):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
+        return
+    leaderboard_data = load_leaderboard(guild_path(interaction.guild.id, monthly_leaderboard_path))
+    def update(all_data):
+        tournament_data = all_data.get(str(tournament_id))
+        if tournament_data is None:
+            raise ValueError(f"No tournament with ID ``{tournament_id}``.")
+        if "bracket" in tournament_data and not reset:
+            raise ValueError(f"Tournament ``{tournament_id}`` already has a bracket. Use ``reset: True`` to replace it and discard its results.")
+        approved = {secret_id: team for secret_id, team in tournament_data["teams"].items() if team["registration"] == "Approved"}
+        tournament_data["bracket"] = create_bracket(bracket_format, seed_teams(approved, leaderboard_data), swiss_rounds or None)
+        return tournament_data
+    try:
+        tournament_data = update_json(guild_path(interaction.guild.id, tournaments_path), update)
+    except ValueError as e:
+        await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+        return
+    await interaction.response.send_message(embed=bracket_embed(interaction, tournament_id, tournament_data))
+
+@bot.tree.command(name="result", description="Reports the winner of a bracket match")
+@app_commands.guild_only()
+async def result(interaction: discord.Interaction, tournament_id: int, match_id: str, winner_team_id: str):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
+        return
+    def update(all_data):
+        tournament_data = all_data.get(str(tournament_id))
+        if tournament_data is None or "bracket" not in tournament_data:
+            raise ValueError(f"Tournament ``{tournament_id}`` has no bracket.")
+        bracket = tournament_data["bracket"]
+        # the winner can be given as the leader's Discord ID (the team ID used
+        # by /winner), the team name or the internal secret id
+        winner = winner_team_id.strip()
+        for secret_id in bracket["matches"].get(match_id.strip().upper(), {}).get("teams", []):
+            team = tournament_data["teams"].get(secret_id)
+            if team and (winner in (secret_id, str(team["team_id"])) or winner.lower() == team["team_name"].lower()):
+                winner = secret_id
+                break
+        match = report(bracket, match_id.strip().upper(), winner)
+        if bracket["format"] == "swiss":
+            swiss_finish(bracket)
+        return tournament_data, match
+    try:
+        tournament_data, match = update_json(guild_path(interaction.guild.id, tournaments_path), update)
+    except ValueError as e:
+        await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+        return
+    winner_name = tournament_data["teams"][match["winner"]]["team_name"]
+    record_match(interaction.guild.id, tournament_id, match["id"], winner_name, [tournament_data["teams"][match["loser"]]["team_name"]])
+    await interaction.response.send_message(content=f"**{winner_name}** won match ``{match['id']}``", embed=bracket_embed(interaction, tournament_id, tournament_data))
+
+@result.autocomplete("winner_team_id")
+async def result_winner_autocomplete(interaction: discord.Interaction, current: str):
+    tournament_data = load_json(guild_path(interaction.guild.id, tournaments_path)).get(str(interaction.namespace.tournament_id))
+    if tournament_data is None or "bracket" not in tournament_data:
+        return []
+    match = tournament_data["bracket"]["matches"].get(str(interaction.namespace.match_id or "").strip().upper())
+    if match is None:
+        return []
+    choices = []
+    for secret_id in match["teams"]:
+        team = tournament_data["teams"].get(secret_id)
+        if team and current.lower() in team["team_name"].lower():
+            choices.append(app_commands.Choice(name=team["team_name"][:100], value=str(team["team_id"])))
+    return choices
+
+@bot.tree.command(name="next_round", description="Generates the next Swiss round")
+@app_commands.guild_only()
+async def next_round(interaction: discord.Interaction, tournament_id: int):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
+        return
+    def update(all_data):
+        tournament_data = all_data.get(str(tournament_id))
+        if tournament_data is None or tournament_data.get("bracket", {}).get("format") != "swiss":
+            raise ValueError(f"Tournament ``{tournament_id}`` has no Swiss bracket.")
+        pairs, bye = swiss_next_round(tournament_data["bracket"])
+        return tournament_data, bye
+    try:
+        tournament_data, bye = update_json(guild_path(interaction.guild.id, tournaments_path), update)
+    except ValueError as e:
+        await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+        return
+    content = f"**{tournament_data['teams'][bye]['team_name']}** gets a bye this round" if bye else None
+    await interaction.response.send_message(content=content, embed=bracket_embed(interaction, tournament_id, tournament_data))
+
+@bot.tree.command(name="ban", description="Bans a user, contact number, player or team name from registering")
+@app_commands.guild_only()
+@app_commands.choices(kind=[
+    app_commands.Choice(name="Discord User ID", value="user"),
+    app_commands.Choice(name="Contact Number", value="contact"),
+    app_commands.Choice(name="Player IGN", value="ign"),
+    app_commands.Choice(name="Team Name", value="team"),
+])
+async def ban(interaction: discord.Interaction, kind: str, value: str, reason: str = "No reason given"):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
+        return
+    key = identity_key(kind, value)
+    if key is None:
+        await interaction.response.send_message("❌ Invalid value.", ephemeral=True)
+        return
+    update_json(guild_path(interaction.guild.id, bans_path), lambda bans: bans.update({key: reason}))
+    get_registration_guard(interaction.guild.id).ban(key)
+    await interaction.response.send_message(f"Banned ``{key}`` from registering. Reason: {reason}", ephemeral=True)
+
+@bot.tree.command(name="unban", description="Removes a registration ban")
+@app_commands.guild_only()
+@app_commands.choices(kind=[
+    app_commands.Choice(name="Discord User ID", value="user"),
+    app_commands.Choice(name="Contact Number", value="contact"),
+    app_commands.Choice(name="Player IGN", value="ign"),
+    app_commands.Choice(name="Team Name", value="team"),
+])
+async def unban(interaction: discord.Interaction, kind: str, value: str):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
+        return
+    key = identity_key(kind, value)
+    if update_json(guild_path(interaction.guild.id, bans_path), lambda bans: bans.pop(key, None)) is None:
+        await interaction.response.send_message(f"❌ ``{key}`` is not banned.", ephemeral=True)
+        return
+    get_registration_guard(interaction.guild.id).unban(key)
+    await interaction.response.send_message(f"Unbanned ``{key}``.", ephemeral=True)
+
 class LeaderboardView(View):
-    def __init__(self, leaderboard_data, title, user, timeout=60):
+    def __init__(self, leaderboard_data, title, user, timeout=60, rank_by="points"):
         super().__init__(timeout=timeout)
-        self.leaderboard_data = sorted(leaderboard_data.items(), key=lambda x: x[1]['points'], reverse=True)
+        self.rank_by = rank_by
+        self.leaderboard_data = sorted(leaderboard_data.items(), key=lambda x: x[1][rank_by], reverse=True)
         self.title = title
         self.user = user
         self.page = 0
@@ -713,9 +1107,13 @@ class LeaderboardView(View):
         start = self.page * self.entries_per_page
         end = start + self.entries_per_page
         for rank, (team, data) in enumerate(self.leaderboard_data[start:end], start=start + 1):
+            if self.rank_by == "rating":
+                value = f"**{round(data['rating'])}** Rating ({data['wins']} Wins, {data['losses']} Losses, {data['played']} Matches)"
+            else:
+                value = f"**{data['points']}** Points ({data['wins']} Wins, {data['losses']} Losses, {data['played']} Matches)"
             embed.add_field(
-                name=f"``#{rank}`` {team}",
-                value=f"**{data['points']}** Points ({data['wins']} Wins, {data['losses']} Losses, {data['played']} Matches)",
+                name=f"``#{rank}`` {data.get('name', team)}",
+                value=value,
                 inline=False
             )
         embed.set_author(name="Swadeshi LAN",
@@ -752,37 +1150,378 @@ class LeaderboardView(View):
             self.update_buttons()
             await interaction.response.edit_message(embed=self.create_embed(interaction), view=self)
 
-@bot.tree.command(name="lb", description="Shows the leaderboard (weekly/monthly)")
-async def leaderboard(interaction: discord.Interaction, timeframe: str):
+@bot.tree.command(name="lb", description="Shows the leaderboard (weekly/monthly/quiz)")
+@app_commands.guild_only()
+@app_commands.choices(rank_by=[
+    app_commands.Choice(name="Points", value="points"),
+    app_commands.Choice(name="Rating", value="rating"),
+])
+async def leaderboard(interaction: discord.Interaction, timeframe: str, rank_by: str = "points", image: bool = False):
     timeframe = timeframe.lower()
-    if timeframe not in ["weekly", "monthly"]:
-        await interaction.response.send_message("❌ Invalid option! Use `/lb weekly` or `/lb monthly`.", ephemeral=True)
+    leaderboard_paths = {"weekly": leaderboard_path, "monthly": monthly_leaderboard_path, "quiz": quiz_leaderboard_path}
+    if timeframe not in leaderboard_paths:
+        await interaction.response.send_message("❌ Invalid option! Use `/lb weekly`, `/lb monthly` or `/lb quiz`.", ephemeral=True)
+        return
+    if timeframe == "quiz" and rank_by == "rating":
+        await interaction.response.send_message("❌ The quiz leaderboard can only be ranked by points.", ephemeral=True)
         return
 
-    file_path = leaderboard_path if timeframe == "weekly" else monthly_leaderboard_path
+    file_path = guild_path(interaction.guild.id, leaderboard_paths[timeframe])
     leaderboard_data = load_json(file_path)
 
     if not leaderboard_data:
         await interaction.response.send_message(f"❌ No {timeframe} leaderboard data available.", ephemeral=True)
         return
 
-    view = LeaderboardView(leaderboard_data, f"{timeframe.capitalize()} Leaderboard", interaction.user)
+    if rank_by == "rating":
+        ratings = load_json(guild_path(interaction.guild.id, ratings_path)).get("ratings", {})
+        for team_name, stats in leaderboard_data.items():
+            stats["rating"] = ratings.get(team_name, {}).get("rating", rating_engine.initial_rating)
+
+    if image:
+        await interaction.response.defer(thinking=True)
+        ranked = sorted(leaderboard_data.items(), key=lambda x: x[1][rank_by], reverse=True)[:card_rows]
+        unit = "Rating" if rank_by == "rating" else "Points"
+        rows = [(rank, data.get("name", team), f"{round(data[rank_by])} {unit}") for rank, (team, data) in enumerate(ranked, start=1)]
+        version = file_version(file_path, guild_path(interaction.guild.id, ratings_path)) if rank_by == "rating" else file_version(file_path)
+        png = await asyncio.to_thread(card_renderer.render, f"{interaction.guild.id}-{timeframe}-{rank_by}", version, f"{timeframe.capitalize()} Leaderboard", rows)
+        await interaction.followup.send(file=discord.File(io.BytesIO(png), filename="leaderboard.png"))
+        return
+
+    view = LeaderboardView(leaderboard_data, f"{timeframe.capitalize()} Leaderboard", interaction.user, rank_by=rank_by)
     await interaction.response.send_message(embed=view.create_embed(interaction), view=view)
 
-@tasks.loop(hours=168)
-async def reset_weekly_leaderboard():
+@bot.tree.command(name="standings", description="Shows the standings card for a bracket tournament")
+@app_commands.guild_only()
+async def tournament_standings(interaction: discord.Interaction, tournament_id: int):
+    file_path = guild_path(interaction.guild.id, tournaments_path)
+    all_data = load_json(file_path)
+    tournament_data = all_data.get(str(tournament_id))
+    if tournament_data is None or "bracket" not in tournament_data:
+        await interaction.response.send_message(f"❌ Tournament ``{tournament_id}`` has no bracket.", ephemeral=True)
+        return
+    await interaction.response.defer(thinking=True)
+    teams = tournament_data["teams"]
+    rows = [(rank, teams[team]["team_name"], f"{wins}W - {losses}L") for rank, (team, wins, losses) in enumerate(standings(tournament_data["bracket"])[:card_rows], start=1)]
+    png = await asyncio.to_thread(card_renderer.render, f"{interaction.guild.id}-standings-{tournament_id}", file_version(file_path), f"{tournament_data['tournament_name']} Standings", rows)
+    await interaction.followup.send(file=discord.File(io.BytesIO(png), filename="standings.png"))
+
+@bot.tree.command(name="recompute_ratings", description="Rebuilds all ratings from the match history")
+@app_commands.guild_only()
+async def recompute_ratings(interaction: discord.Interaction):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
+        return
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    file_path = guild_path(interaction.guild.id, matches_path)
+    records = load_matches(file_path)
+    replayed = len(records)
+    rebuilt = await asyncio.to_thread(rating_engine.recompute, records)
+    # results reported while the replay ran are already in the history but
+    # not in rebuilt; apply them on top so the saved state misses none
+    records = load_matches(file_path)
+    def update(state):
+        state.clear()
+        state.update(rebuilt)
+        for record in records[replayed:]:
+            rating_engine.apply(state, record)
+        state.update(rating_engine.snapshot(state))
+        return len(state["ratings"])
+    teams = update_json(guild_path(interaction.guild.id, ratings_path), update)
+    await interaction.followup.send(f"Recomputed {rating_engine.system} ratings for ``{teams}`` teams from ``{len(records)}`` matches.", ephemeral=True)
+
+async def start_checkin(guild_id, tournament_id):
+    expiry = int(time.time()) + checkin_minutes * 60
+    def update(all_data):
+        tournament_data = all_data.get(str(tournament_id))
+        pending = []
+        if tournament_data is None:
+            return None, pending
+        for secret_id, team in tournament_data["teams"].items():
+            if team["registration"] == "Approved" and not team["verified"]:
+                team["otp"] = generate_otp()
+                team["otp_expiry"] = expiry
+                checkin_wheel.schedule((guild_id, str(tournament_id), secret_id), expiry)
+                pending.append(team)
+        return tournament_data, pending
+    tournament_data, pending = update_json(guild_path(guild_id, tournaments_path), update)
+    if tournament_data is None:
+        return 0
+    for team in pending:
+        embed = discord.Embed(title="**Check-in Open**",
+                              description=f"**{tournament_data['tournament_name']}** is starting! Check in right here or in the server with ``/checkin {tournament_id} {team['otp']}`` before <t:{expiry}:t> or your slot will be released.",
+                              color=0xffffff)
+        embed.set_footer(text="Made by Scott with ❤")
+        try:
+            user = bot.get_user(team["team_id"]) or await bot.fetch_user(team["team_id"])
+            await user.send(embed=embed)
+        except discord.HTTPException as e:
+            print(f"Could not DM check-in OTP to {team['team_id']}: {e}")
+    return len(pending)
+
+@bot.tree.command(name="start_checkin", description="DMs every approved team an OTP to check in with")
+@app_commands.guild_only()
+async def start_checkin_command(interaction: discord.Interaction, tournament_id: int):
+    if not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message("❌ Only moderators can use this command!", ephemeral=True)
+        return
+    await interaction.response.defer(thinking=True, ephemeral=True)
+    count = await start_checkin(interaction.guild.id, tournament_id)
+    await interaction.followup.send(f"Sent check-in OTPs to ``{count}`` teams. Unverified teams will be released in {checkin_minutes} minutes.", ephemeral=True)
+
+class QuizView(View):
+    def __init__(self, key, index, options):
+        super().__init__(timeout=None)
+        self.key = key
+        self.index = index
+        for choice, option in enumerate(options):
+            # Discord rejects button labels over 80 characters; answers are
+            # checked by index so a shortened label is still scored right
+            button = Button(label=str(option)[:80], style=discord.ButtonStyle.gray)
+            button.callback = self.make_callback(choice)
+            self.add_item(button)
+
+    def make_callback(self, choice):
+        async def callback(interaction: discord.Interaction):
+            await self.answer(interaction, choice)
+        return callback
+
+    async def answer(self, interaction, choice):
+        session = quiz_engine.sessions.get(self.key)
+        try:
+            correct = quiz_engine.answer(self.key, interaction.user.id, self.index, choice, name=interaction.user.name)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+            return
+        if not session.solo:
+            await interaction.response.send_message("✅ Correct!" if correct else "❌ Wrong answer!", ephemeral=True)
+            return
+        answer = quiz_engine.question(session)["answer"]
+        await advance_quiz(session, interaction, "✅ Correct!" if correct else f"❌ Wrong! The answer was **{answer}**.")
+
+def quiz_embed(session, question, note=None):
+    description = f"{note}\n\n**{question['question']}**" if note else f"**{question['question']}**"
+    embed = discord.Embed(title=f"**Question {session.index + 1} of {len(session.order)}**", description=description, color=0xffffff)
+    embed.add_field(name="Time Left", value=f"<t:{int(session.asked_at + quiz_engine.question_seconds)}:R>", inline=True)
+    embed.set_footer(text="Made by Scott with ❤")
+    return embed
+
+def quiz_results_embed(session, note=None):
+    lines = [f"``#{rank}`` <@{user_id}> - **{points}** Points ({correct}/{len(session.order)} correct)"
+             for rank, (user_id, points, correct) in enumerate(session.results()[:10], start=1)]
+    description = "\n".join(lines) or "Nobody answered a question."
+    embed = discord.Embed(title="**Quiz Over**", description=f"{note}\n\n{description}" if note else description, color=0xffffff)
+    embed.set_footer(text="Made by Scott with ❤")
+    return embed
+
+def record_quiz(guild_id, session):
+    # keyed by user id so renames and clashing names keep separate scores;
+    # the latest name is kept for display
+    def update(leaderboard_data):
+        for user_id, (points, correct) in session.scores.items():
+            stats = leaderboard_data.setdefault(str(user_id), {"wins": 0, "losses": 0, "points": 0, "played": 0})
+            stats["name"] = session.names.get(user_id, stats.get("name", str(user_id)))
+            stats["wins"] += correct
+            stats["losses"] += len(session.order) - correct
+            stats["points"] += points
+            stats["played"] += 1
+    update_json(guild_path(guild_id, quiz_leaderboard_path), update)
+
+async def advance_quiz(session, interaction=None, note=None):
+    # keys are (kind, guild_id, user or channel id)
+    question = quiz_engine.next_question(session.key)
+    message = quiz_messages.get(session.key)
+    # a stopped view leaves discord.py's view store, so old questions'
+    # buttons do not pile up for as long as the bot runs
+    previous = quiz_views.pop(session.key, None)
+    if previous is not None:
+        previous.stop()
+    if question is None:
+        quiz_engine.finish(session.key)
+        quiz_messages.pop(session.key, None)
+        record_quiz(session.key[1], session)
+        embed, view = quiz_results_embed(session, note), None
+    else:
+        embed, view = quiz_embed(session, question, note), QuizView(session.key, session.index, question["options"])
+        quiz_views[session.key] = view
+    if interaction is not None:
+        await interaction.response.edit_message(embed=embed, view=view)
+    elif message is not None:
+        await message.edit(embed=embed, view=view)
+
+@bot.tree.command(name="quiz", description="Starts a quiz for yourself or for the whole channel")
+@app_commands.guild_only()
+@app_commands.choices(mode=[
+    app_commands.Choice(name="Solo", value="solo"),
+    app_commands.Choice(name="Channel", value="channel"),
+])
+@app_commands.choices(difficulty=[
+    app_commands.Choice(name="Easy", value="easy"),
+    app_commands.Choice(name="Medium", value="medium"),
+    app_commands.Choice(name="Hard", value="hard"),
+])
+async def quiz(interaction: discord.Interaction, mode: str = "solo", questions: int = 5, category: str = None, difficulty: str = None):
+    if mode == "channel" and not interaction.user.guild_permissions.manage_guild:
+        await interaction.response.send_message("❌ Only moderators can start a channel quiz!", ephemeral=True)
+        return
+    key = ("user", interaction.guild.id, interaction.user.id) if mode == "solo" else ("channel", interaction.guild.id, interaction.channel.id)
+    try:
+        session = quiz_engine.start(key, interaction.user.id, solo=mode == "solo", count=min(questions, 25), category=category, difficulty=difficulty)
+    except ValueError as e:
+        await interaction.response.send_message(f"❌ {e}", ephemeral=True)
+        return
+    question = quiz_engine.question(session)
+    note = None if session.solo else "Everyone can answer, points are given for speed!"
+    view = QuizView(key, 0, question["options"])
+    try:
+        await interaction.response.send_message(embed=quiz_embed(session, question, note), view=view)
+    except discord.HTTPException:
+        quiz_engine.finish(key)
+        raise
+    quiz_views[key] = view
+    quiz_messages[key] = await interaction.original_response()
+
+@quiz.autocomplete("category")
+async def quiz_category_autocomplete(interaction: discord.Interaction, current: str):
+    try:
+        categories = question_bank.categories()
+    except ValueError:
+        return []
+    return [app_commands.Choice(name=category, value=category) for category in categories if current.lower() in category][:25]
+
+@tasks.loop(seconds=1)
+async def expire_quiz_questions():
+    for session in quiz_engine.expire():
+        answer = quiz_engine.question(session)["answer"]
+        try:
+            await advance_quiz(session, note=f"⏰ Time's up! The answer was **{answer}**.")
+        except discord.HTTPException as e:
+            print(f"Error moving quiz {session.key} on: {e}")
+
+def find_checkin_team(guild_ids, tournament_id, user_id):
+    for guild_id in guild_ids:
+        tournament_data = load_json(guild_path(guild_id, tournaments_path)).get(str(tournament_id))
+        if tournament_data is None:
+            continue
+        for secret_id, team in tournament_data["teams"].items():
+            if team["team_id"] == user_id and team["registration"] == "Approved":
+                return guild_id, secret_id
+    return None
+
+@bot.tree.command(name="checkin", description="Check in for a tournament with the OTP sent to you")
+async def checkin(interaction: discord.Interaction, tournament_id: int, otp: str):
+    if interaction.guild is not None:
+        guild_ids = [interaction.guild.id]
+    else:
+        # the OTP arrives by DM, so this usually runs there, on shard 0's
+        # process: the shared index says which guild owns the tournament, and
+        # the owning process sees the verified flag before releasing the team
+        guild_ids = load_json(storage.shared_path(tournament_guilds_path)).get(str(tournament_id), [])
+    found = find_checkin_team(guild_ids, tournament_id, interaction.user.id)
+    if found is None:
+        await interaction.response.send_message(f"❌ You have no approved team in tournament ``{tournament_id}``!", ephemeral=True)
+        return
+    guild_id, secret_id = found
+    def update(all_data):
+        tournament_data = all_data[str(tournament_id)]
+        team = tournament_data["teams"][secret_id]
+        if team["verified"]:
+            return "✅ Your team is already checked in!"
+        if not team["otp_expiry"] or team["otp_expiry"] < time.time() or not otp_matches(team["otp"], otp):
+            return "❌ Invalid or expired OTP!"
+        team["verified"] = True
+        team["otp"] = None
+        team["otp_expiry"] = None
+        checkin_wheel.cancel((guild_id, str(tournament_id), secret_id))
+        return f"✅ **{team['team_name']}** is checked in for **{tournament_data['tournament_name']}**. Good Luck!"
+    message = update_json(guild_path(guild_id, tournaments_path), update)
+    await interaction.response.send_message(message, ephemeral=True)
+
+@tasks.loop(seconds=1)
+async def expire_checkins():
+    expired = checkin_wheel.advance(time.time())
+    if not expired:
+        return
+    by_guild = {}
+    for (guild_id, tournament_id, secret_id), payload in expired:
+        by_guild.setdefault(guild_id, []).append((tournament_id, secret_id))
+    released = []
+    reopened = {}
+    def release(all_data, guild_id, guard, team_index, entries):
+        for tournament_id, secret_id in entries:
+            tournament_data = all_data.get(tournament_id)
+            if tournament_data is None or secret_id not in tournament_data["teams"]:
+                continue
+            team = tournament_data["teams"][secret_id]
+            if team["verified"] or team["registration"] != "Approved":
+                continue
+            team["registration"] = "Released"
+            team["otp"] = None
+            team["otp_expiry"] = None
+            tournament_data["registerd_teams"] -= 1
+            # the freed slot only reopens registration before the tournament
+            # starts; OTPs from the scheduled check-in expire right at the start
+            if tournament_data["status"] == "Registrations Closed" and tournament_data.get("tournament_time", 0) > time.time():
+                tournament_data["status"] = "running"
+                reopened[(guild_id, tournament_id)] = tournament_data
+            guard.remove_team(tournament_id, secret_id, team)
+            team_index.add_team(tournament_id, secret_id, team, tournament_data["tournament_name"])
+            released.append((tournament_id, tournament_data, team))
+    for guild_id, entries in by_guild.items():
+        guard, team_index = get_registration_guard(guild_id), get_team_index(guild_id)
+        update_json(guild_path(guild_id, tournaments_path), lambda all_data: release(all_data, guild_id, guard, team_index, entries))
+    for (guild_id, tournament_id), tournament_data in reopened.items():
+        # the scheduled auto-close already fired: close again at the start
+        payload = {"guild_id": guild_id, "tournament_id": tournament_id}
+        if not scheduler.has("close_registrations", payload):
+            scheduler.schedule(tournament_data["tournament_time"], "close_registrations", payload)
+        try:
+            await reopen_registrations(tournament_id, tournament_data)
+        except discord.HTTPException as e:
+            print(f"Error reopening registrations for {tournament_id}: {e}")
+    for tournament_id, tournament_data, team in released:
+        try:
+            await release_team(tournament_id, tournament_data, team)
+        except discord.HTTPException as e:
+            print(f"Error releasing team {team['team_name']}: {e}")
+
+async def release_team(tournament_id, tournament_data, team):
+    channel = bot.get_channel(tournament_data["channel_id"])
+    if channel is None:
+        return
+    role = discord.utils.get(channel.guild.roles, name=f"{tournament_id}-registerd")
+    member = await member_cache.resolve(channel.guild, team["team_id"])
+    if member is None:
+        return
+    if role:
+        await member.remove_roles(role)
+    embed = discord.Embed(title="**Slot Released**",
+                          description=f"Your team **{team['team_name']}** did not check in for **{tournament_data['tournament_name']}** in time, so your slot has been released.",
+                          color=15548997)
+    embed.set_footer(text="Made by Scott with ❤")
+    await member.send(embed=embed)
+
+async def reopen_registrations(tournament_id, tournament_data):
+    channel = bot.get_channel(tournament_data["channel_id"])
+    info_channel = bot.get_channel(tournament_data["info_channel_id"])
+    if channel is None or info_channel is None:
+        return
+    msg = await channel.fetch_message(tournament_data["msg"])
+    max_teams = tournament_data.get("max_teams", tournament_data["registerd_teams"] + 1)
+    await msg.edit(view=RegisterButton(category=info_channel.category, spreadsheet_id=tournament_data["spreadsheet_id"], entry_fee=tournament_data["entry_fee"], tournament_name=tournament_data["tournament_name"], tournament_id=tournament_id, msg=msg, max_teams=max_teams))
+
+async def reset_weekly_leaderboard(guild_id):
     try:
-        if os.path.exists(leaderboard_path):
-            os.remove(leaderboard_path)
+        if os.path.exists(guild_path(guild_id, leaderboard_path)):
+            os.remove(guild_path(guild_id, leaderboard_path))
             print("Weekly leaderboard has been reset.")
     except Exception as e:
         print(f"Error resetting weekly leaderboard: {e}")
 
-@tasks.loop(hours=720)
-async def reset_monthly_leaderboard():
+async def reset_monthly_leaderboard(guild_id):
     try:
-        if os.path.exists(monthly_leaderboard_path):
-            os.remove(monthly_leaderboard_path)
+        if os.path.exists(guild_path(guild_id, monthly_leaderboard_path)):
+            os.remove(guild_path(guild_id, monthly_leaderboard_path))
             print("Monthly leaderboard has been reset.")
     except Exception as e:
         print(f"Error resetting monthly leaderboard: {e}")
@@ -800,6 +1539,7 @@ async def on_command_error(ctx, error):
         print(f"Error: {error}")
 
 @commands.command(name="delcat")
+@commands.guild_only()
 @commands.has_permissions(manage_channels=True)
 async def delcat(ctx, category_id: int):
     guild = ctx.guild
@@ -0,0 +1,273 @@
+import math
+
+
+def seed_order(size):
+    # standard placement, 1 v 16, 8 v 9, ... so the top seeds meet last
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return order
+
+
+def seed_teams(teams, leaderboard_data):
+    def key(secret_id):
+        team_name = teams[secret_id]["team_name"]
+        return (-leaderboard_data.get(team_name, {}).get("points", 0), team_name.lower())
+    return sorted(teams, key=key)
+
+
+def new_match(match_id, bracket, round_number):
+    return {
+        "id": match_id,
+        "bracket": bracket,
+        "round": round_number,
+        "teams": [None, None],
+        "filled": 0,
+        "winner": None,
+        "loser": None,
+        "done": False,
+        "next": None,
+        "loser_next": None,
+    }
+
+
+def build_winners_bracket(data, seeds):
+    size = 1 << max(1, math.ceil(math.log2(len(seeds))))
+    rounds = int(math.log2(size))
+    matches = data["matches"]
+    for round_number in range(1, rounds + 1):
+        for i in range(1, size // 2 ** round_number + 1):
+            match = new_match(f"W{round_number}-{i}", "W", round_number)
+            if round_number < rounds:
+                match["next"] = [f"W{round_number + 1}-{(i + 1) // 2}", (i - 1) % 2]
+            matches[match["id"]] = match
+    data["rounds"] = rounds
+    return size, rounds
+
+
+def create_single_elimination(seeds):
+    data = {"format": "single", "seeds": list(seeds), "matches": {}, "champion": None}
+    size, rounds = build_winners_bracket(data, seeds)
+    fill_first_round(data, seeds, size)
+    return data
+
+
+def create_double_elimination(seeds):
+    data = {"format": "double", "seeds": list(seeds), "matches": {}, "champion": None}
+    size, rounds = build_winners_bracket(data, seeds)
+    matches = data["matches"]
+    grand_final = new_match("GF-1", "GF", 1)
+    matches["GF-1"] = grand_final
+    matches[f"W{rounds}-1"]["next"] = ["GF-1", 0]
+    if rounds == 1:
+        matches["W1-1"]["loser_next"] = ["GF-1", 1]
+        fill_first_round(data, seeds, size)
+        return data
+
+    # losers round 2j-1 pairs up the survivors of round 2j-2 (or the losers of
+    # winners round 1), losers round 2j takes them against the fresh drop-downs
+    # from winners round j+1, in reversed order to put off rematches
+    for i in range(1, size // 4 + 1):
+        match = new_match(f"L1-{i}", "L", 1)
+        matches[match["id"]] = match
+        matches[f"W1-{2 * i - 1}"]["loser_next"] = [match["id"], 0]
+        matches[f"W1-{2 * i}"]["loser_next"] = [match["id"], 1]
+    for j in range(1, rounds):
+        count = size // 2 ** (j + 1)
+        for i in range(1, count + 1):
+            match = new_match(f"L{2 * j}-{i}", "L", 2 * j)
+            matches[match["id"]] = match
+            matches[f"L{2 * j - 1}-{i}"]["next"] = [match["id"], 0]
+            dropped = count - i + 1 if j % 2 else i
+            matches[f"W{j + 1}-{dropped}"]["loser_next"] = [match["id"], 1]
+        if j == rounds - 1:
+            break
+        for i in range(1, count // 2 + 1):
+            match = new_match(f"L{2 * j + 1}-{i}", "L", 2 * j + 1)
+            matches[match["id"]] = match
+            matches[f"L{2 * j}-{2 * i - 1}"]["next"] = [match["id"], 0]
+            matches[f"L{2 * j}-{2 * i}"]["next"] = [match["id"], 1]
+    matches[f"L{2 * (rounds - 1)}-1"]["next"] = ["GF-1", 1]
+    fill_first_round(data, seeds, size)
+    return data
+
+
+def fill_first_round(data, seeds, size):
+    order = seed_order(size)
+    for i in range(size // 2):
+        entrants = [seeds[seed - 1] if seed <= len(seeds) else None for seed in order[2 * i:2 * i + 2]]
+        for slot, team in enumerate(entrants):
+            place(data, f"W1-{i + 1}", slot, team)
+
+
+def place(data, match_id, slot, team):
+    match = data["matches"][match_id]
+    match["teams"][slot] = team
+    match["filled"] += 1
+    if match["filled"] == 2 and None in match["teams"]:
+        # a bye, or a slot fed by a bye further up: whoever is there walks through
+        a, b = match["teams"]
+        finish(data, match, a if a is not None else b, None)
+
+
+def finish(data, match, winner, loser):
+    match["winner"] = winner
+    match["loser"] = loser
+    match["done"] = True
+    if match["next"]:
+        place(data, match["next"][0], match["next"][1], winner)
+    if match["loser_next"]:
+        place(data, match["loser_next"][0], match["loser_next"][1], loser)
+    if not match["next"] and match["bracket"] != "S":
+        data["champion"] = winner
+
+
+def report(data, match_id, winner):
+    match = data["matches"].get(match_id)
+    if match is None:
+        raise ValueError(f"No match with ID {match_id}")
+    if match["done"]:
+        raise ValueError(f"Match {match_id} already has a result")
+    if match["filled"] < 2:
+        raise ValueError(f"Match {match_id} is still waiting for its teams")
+    if winner not in match["teams"]:
+        raise ValueError(f"That team is not playing in match {match_id}")
+    a, b = match["teams"]
+    finish(data, match, winner, b if winner == a else a)
+    return match
+
+
+def open_matches(data):
+    return [match for match in data["matches"].values()
+            if match["filled"] == 2 and not match["done"]]
+
+
+def create_swiss(seeds, rounds=None):
+    data = {
+        "format": "swiss",
+        "seeds": list(seeds),
+        "matches": {},
+        "round": 0,
+        "rounds": rounds or max(1, math.ceil(math.log2(len(seeds)))),
+        "byes": [],
+        "champion": None,
+    }
+    swiss_next_round(data)
+    return data
+
+
+def swiss_scores(data):
+    scores = {team: 0 for team in data["seeds"]}
+    for match in data["matches"].values():
+        if match["done"]:
+            scores[match["winner"]] += 1
+    for team in data["byes"]:
+        scores[team] += 1
+    return scores
+
+
+def swiss_next_round(data):
+    if open_matches(data):
+        raise ValueError(f"Round {data['round']} is still being played")
+    if data["round"] >= data["rounds"]:
+        raise ValueError("All Swiss rounds have been played")
+    scores = swiss_scores(data)
+    seed_rank = {team: rank for rank, team in enumerate(data["seeds"])}
+    ranking = sorted(data["seeds"], key=lambda team: (-scores[team], seed_rank[team]))
+    played = {}
+    for match in data["matches"].values():
+        a, b = match["teams"]
+        played.setdefault(a, set()).add(b)
+        played.setdefault(b, set()).add(a)
+    pairs, bye = swiss_pairings(ranking, played, set(data["byes"]))
+    data["round"] += 1
+    for i, (a, b) in enumerate(pairs, start=1):
+        match = new_match(f"S{data['round']}-{i}", "S", data["round"])
+        match["teams"] = [a, b]
+        match["filled"] = 2
+        data["matches"][match["id"]] = match
+    if bye is not None:
+        data["byes"].append(bye)
+    return pairs, bye
+
+
+def swiss_finish(data):
+    if data["round"] == data["rounds"] and not open_matches(data):
+        scores = swiss_scores(data)
+        seed_rank = {team: rank for rank, team in enumerate(data["seeds"])}
+        data["champion"] = min(data["seeds"], key=lambda team: (-scores[team], seed_rank[team]))
+    return data["champion"]
+
+
+def standings(data):
+    wins = {team: 0 for team in data["seeds"]}
+    losses = {team: 0 for team in data["seeds"]}
+    for match in data["matches"].values():
+        if match["done"] and match["loser"] is not None:
+            wins[match["winner"]] += 1
+            losses[match["loser"]] += 1
+    for team in data.get("byes", []):
+        wins[team] += 1
+    seed_rank = {team: rank for rank, team in enumerate(data["seeds"])}
+    ranking = sorted(data["seeds"], key=lambda team: (team != data["champion"], -wins[team], losses[team], seed_rank[team]))
+    return [(team, wins[team], losses[team]) for team in ranking]
+
+
+def swiss_pairings(ranking, played, had_bye=(), repair_window=64):
+    # Greedy top-down pairing: each team takes the highest ranked opponent it
+    # has not met yet. When a team is left with only rematches, recent pairs
+    # are swapped around to free a legal opponent. A round costs close to
+    # O(n) since the first legal opponent is almost always a few places away.
+    remaining = list(ranking)
+    bye = None
+    if len(remaining) % 2:
+        bye = next((team for team in reversed(remaining) if team not in had_bye), remaining[-1])
+        remaining.remove(bye)
+    remaining.reverse()
+    no_opponents = frozenset()
+    pairs = []
+
+    def first_legal(team):
+        opponents = played.get(team, no_opponents)
+        for j in range(len(remaining) - 1, -1, -1):
+            if remaining[j] not in opponents:
+                return j
+        return None
+
+    while remaining:
+        a = remaining.pop()
+        j = first_legal(a)
+        if j is not None:
+            pairs.append((a, remaining.pop(j)))
+            continue
+        opponents = played.get(a, no_opponents)
+        for k in range(len(pairs) - 1, max(-1, len(pairs) - 1 - repair_window), -1):
+            c, d = pairs[k]
+            for keep, freed in ((c, d), (d, c)):
+                if keep in opponents:
+                    continue
+                j = first_legal(freed)
+                if j is not None:
+                    pairs[k] = (keep, a)
+                    pairs.append((freed, remaining.pop(j)))
+                    break
+            else:
+                continue
+            break
+        else:
+            # nothing to swap with, allow the rematch
+            pairs.append((a, remaining.pop()))
+    return pairs, bye
+
+
+def create_bracket(bracket_format, seeds, rounds=None):
+    if len(seeds) < 2:
+        raise ValueError("At least 2 approved teams are needed for a bracket")
+    if bracket_format == "single":
+        return create_single_elimination(seeds)
+    if bracket_format == "double":
+        return create_double_elimination(seeds)
+    if bracket_format == "swiss":
+        return create_swiss(seeds, rounds)
+    raise ValueError(f"Unknown bracket format {bracket_format}")
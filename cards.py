@@ -0,0 +1,119 @@
+import io
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+def load_font(font_path, size):
+    for path in (font_path, "DejaVuSans-Bold.ttf", "arialbd.ttf"):
+        if not path:
+            continue
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+class CardRenderer:
+    def __init__(self, logo_path="logo.png", background_path=None, font_path=None,
+                 width=800, row_height=56, cache_size=32):
+        self.width = width
+        self.row_height = row_height
+        self.header_height = 140
+        self.footer_height = 44
+        self.cache_size = cache_size
+        self.title_font = load_font(font_path, 36)
+        self.row_font = load_font(font_path, 24)
+        self.small_font = load_font(font_path, 16)
+        self.logo = Image.open(logo_path).convert("RGBA")
+        self.logo.thumbnail((100, 100))
+        self.background = Image.open(background_path).convert("RGBA") if background_path else None
+        self.lock = threading.Lock()
+        self.cards = OrderedDict()
+        self.bases = OrderedDict()
+        self.row_images = OrderedDict()
+        self.last = OrderedDict()
+
+    def card_height(self, row_count):
+        return self.header_height + row_count * self.row_height + self.footer_height
+
+    def base(self, title, row_count):
+        key = (title, row_count)
+        if key in self.bases:
+            self.bases.move_to_end(key)
+            return self.bases[key]
+        size = (self.width, self.card_height(row_count))
+        if self.background is not None:
+            card = self.background.resize(size)
+        else:
+            card = Image.new("RGBA", size, (18, 18, 24, 255))
+            draw = ImageDraw.Draw(card)
+            for y in range(size[1]):
+                shade = 18 + 22 * y // size[1]
+                draw.line([(0, y), (size[0], y)], fill=(shade, shade, shade + 10, 255))
+        draw = ImageDraw.Draw(card)
+        card.alpha_composite(self.logo, (24, (self.header_height - self.logo.height) // 2))
+        draw.text((150, 42), title, font=self.title_font, fill=(255, 255, 255, 255))
+        draw.text((150, 92), "Swadeshi LAN", font=self.small_font, fill=(200, 200, 200, 255))
+        draw.text((24, size[1] - 32), "Made by Scott with ❤", font=self.small_font, fill=(160, 160, 160, 255))
+        self.bases[key] = card
+        if len(self.bases) > self.cache_size:
+            self.bases.popitem(last=False)
+        return card
+
+    def row_image(self, row):
+        # rows are drawn once and reused while their text stays the same
+        if row in self.row_images:
+            self.row_images.move_to_end(row)
+            return self.row_images[row]
+        rank, name, value = row
+        image = Image.new("RGBA", (self.width - 32, self.row_height - 8), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        colour = {1: (255, 215, 0, 90), 2: (192, 192, 192, 90), 3: (205, 127, 50, 90)}.get(rank, (255, 255, 255, 30))
+        draw.rounded_rectangle([(0, 0), (image.width - 1, image.height - 1)], radius=10, fill=colour)
+        middle = image.height // 2
+        draw.text((16, middle), f"#{rank}", font=self.row_font, fill=(255, 255, 255, 255), anchor="lm")
+        if len(name) > 32:
+            name = name[:31] + "…"
+        draw.text((90, middle), name, font=self.row_font, fill=(255, 255, 255, 255), anchor="lm")
+        draw.text((image.width - 16, middle), value, font=self.row_font, fill=(255, 255, 255, 255), anchor="rm")
+        self.row_images[row] = image
+        if len(self.row_images) > self.cache_size * 25:
+            self.row_images.popitem(last=False)
+        return image
+
+    def render(self, board, version, title, rows):
+        rows = [tuple(row) for row in rows]
+        key = (board, version, title, len(rows))
+        with self.lock:
+            if key in self.cards:
+                self.cards.move_to_end(key)
+                return self.cards[key]
+            base = self.base(title, len(rows))
+            previous = self.last.get(board)
+            if previous and previous[0] == (title, len(rows)):
+                old_rows, card = previous[1], previous[2].copy()
+            else:
+                old_rows, card = [], base.copy()
+            for i, row in enumerate(rows):
+                if i < len(old_rows) and old_rows[i] == row:
+                    continue
+                top = self.header_height + i * self.row_height
+                box = (0, top, self.width, top + self.row_height)
+                card.paste(base.crop(box), box[:2])
+                card.alpha_composite(self.row_image(row), (16, top + 4))
+            # every guild and tournament has its own boards, so the full-size
+            # images kept for re-compositing are bounded like the PNG cache
+            self.last[board] = ((title, len(rows)), rows, card)
+            self.last.move_to_end(board)
+            if len(self.last) > self.cache_size:
+                self.last.popitem(last=False)
+            buffer = io.BytesIO()
+            card.convert("RGB").save(buffer, format="PNG", optimize=False)
+            png = buffer.getvalue()
+            self.cards[key] = png
+            if len(self.cards) > self.cache_size:
+                self.cards.popitem(last=False)
+            return png
@@ -0,0 +1,57 @@
+import math
+import secrets
+
+
+def generate_otp(digits=6):
+    return f"{secrets.randbelow(10 ** digits):0{digits}d}"
+
+
+def otp_matches(expected, given):
+    return expected is not None and secrets.compare_digest(str(expected), str(given).strip())
+
+
+class TimingWheel:
+    # Hashed timing wheel: an entry due at tick t lives in slot t % len(slots),
+    # so scheduling and cancelling are O(1) and each tick only looks at the
+    # entries that hash to its slot instead of every pending OTP.
+    def __init__(self, tick=1.0, slots=1024, now=0.0):
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)]
+        self.entries = {}
+        self.current_tick = int(now // tick)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def schedule(self, key, expires_at, payload=None):
+        self.cancel(key)
+        due_tick = max(math.ceil(expires_at / self.tick), self.current_tick + 1)
+        slot = due_tick % len(self.slots)
+        self.slots[slot][key] = (due_tick, payload)
+        self.entries[key] = slot
+
+    def cancel(self, key):
+        slot = self.entries.pop(key, None)
+        if slot is None:
+            return False
+        del self.slots[slot][key]
+        return True
+
+    def advance(self, now):
+        target = int(now // self.tick)
+        expired = []
+        # after a long stall one full turn of the wheel visits every slot
+        steps = min(target - self.current_tick, len(self.slots))
+        for step in range(1, steps + 1):
+            bucket = self.slots[(self.current_tick + step) % len(self.slots)]
+            if not bucket:
+                continue
+            due = [key for key, (due_tick, payload) in bucket.items() if due_tick <= target]
+            for key in due:
+                expired.append((key, bucket.pop(key)[1]))
+                del self.entries[key]
+        self.current_tick = max(self.current_tick, target)
+        return expired
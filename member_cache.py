@@ -0,0 +1,68 @@
+from collections import OrderedDict
+
+import discord
+
+
+def build_intents(profile):
+    if profile == "all":
+        return discord.Intents.all()
+    if profile == "minimal":
+        # roles, channels and categories all come with the guilds intent;
+        # message content is only kept for the s! prefix commands
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.guild_messages = True
+        intents.message_content = True
+        return intents
+    raise ValueError(f"Unknown intents profile {profile!r}, use 'all' or 'minimal'")
+
+
+def client_options(profile):
+    options = {"intents": build_intents(profile)}
+    if profile == "minimal":
+        # no member chunking and no message cache: members are picked up from
+        # interactions instead and messages are always fetched by id
+        options["member_cache_flags"] = discord.MemberCacheFlags.none()
+        options["chunk_guilds_at_startup"] = False
+        options["max_messages"] = None
+    return options
+
+
+class MemberCache:
+    # Members who used the bot recently, evicted least recently used first.
+    # With the minimal profile this is the only member cache there is.
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.members = OrderedDict()
+
+    def __len__(self):
+        return len(self.members)
+
+    def add(self, member):
+        if not isinstance(member, discord.Member) or self.max_size <= 0:
+            return
+        key = (member.guild.id, member.id)
+        self.members[key] = member
+        self.members.move_to_end(key)
+        if len(self.members) > self.max_size:
+            self.members.popitem(last=False)
+
+    def get(self, guild_id, user_id):
+        member = self.members.get((guild_id, user_id))
+        if member is not None:
+            self.members.move_to_end((guild_id, user_id))
+        return member
+
+    def remove(self, guild_id, user_id):
+        self.members.pop((guild_id, user_id), None)
+
+    async def resolve(self, guild, user_id):
+        member = guild.get_member(user_id) or self.get(guild.id, user_id)
+        if member is not None:
+            return member
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+        self.add(member)
+        return member
@@ -0,0 +1,164 @@
+import json
+import mmap
+import os
+import random
+import threading
+from array import array
+from bisect import bisect_left
+
+
+class SeenSet:
+    # Sparse bitset of question numbers: only the 64-bit words that have a
+    # bit set are stored, in two parallel arrays sorted by word number. A
+    # player who has seen 50 questions out of a million costs well under a
+    # kilobyte instead of a 125 KB bitmap.
+    __slots__ = ("keys", "words", "count")
+
+    def __init__(self):
+        self.keys = array("I")
+        self.words = array("Q")
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, number):
+        key = number >> 6
+        i = bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key and self.words[i] >> (number & 63) & 1 == 1
+
+    def add(self, number):
+        key = number >> 6
+        bit = 1 << (number & 63)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            if self.words[i] & bit:
+                return
+            self.words[i] |= bit
+        else:
+            self.keys.insert(i, key)
+            self.words.insert(i, bit)
+        self.count += 1
+
+    def clear(self):
+        del self.keys[:]
+        del self.words[:]
+        self.count = 0
+
+
+def sample(pool, seen, count, rng=random, tries=16):
+    # Rejection sampling: while most of the pool is unseen a random pick hits
+    # a new question almost every time. After too many misses we fall back to
+    # a scan from a random point, and once every question in the pool has
+    # been seen the player starts over.
+    picked = []
+    for _ in range(min(count, len(pool))):
+        number = None
+        for _ in range(tries):
+            candidate = pool[rng.randrange(len(pool))]
+            if candidate not in seen:
+                number = candidate
+                break
+        if number is None:
+            start = rng.randrange(len(pool))
+            for i in range(len(pool)):
+                candidate = pool[(start + i) % len(pool)]
+                if candidate not in seen:
+                    number = candidate
+                    break
+        if number is None:
+            seen.clear()
+            for number in picked:
+                seen.add(number)
+            number = next(candidate for candidate in pool if candidate not in seen)
+        seen.add(number)
+        picked.append(number)
+    return picked
+
+
+class QuestionBank:
+    # A JSONL file with one question per line:
+    # {"question": ..., "options": [...], "answer": ..., "category": ..., "difficulty": ...}
+    # The file is memory-mapped and only line offsets and tag indexes are kept
+    # in memory; a question is parsed when it is asked.
+    # The index is built into locals and published with offsets set last, so
+    # another thread sees either no index or a complete one. Readers pass
+    # wait=False: while a background load is running they get a ValueError
+    # instead of blocking the event loop.
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.lock = threading.Lock()
+        self.file = None
+        self.data = None
+        self.offsets = None
+        self.indexes = None
+
+    def load(self, wait=True):
+        if self.offsets is not None:
+            return
+        if not self.lock.acquire(wait):
+            raise ValueError("The question bank is still loading, try again in a moment!")
+        try:
+            if self.offsets is not None:
+                return
+            offsets = array("Q")
+            indexes = {}
+            file = None
+            if not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0:
+                data = b""
+            else:
+                file = open(self.file_path, "rb")
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                position = 0
+                for line in iter(data.readline, b""):
+                    if line.strip():
+                        question = json.loads(line)
+                        number = len(offsets)
+                        offsets.append(position)
+                        category = str(question.get("category", "general")).lower()
+                        difficulty = str(question.get("difficulty", "medium")).lower()
+                        for key in ((category, difficulty), (category, None), (None, difficulty)):
+                            indexes.setdefault(key, array("I")).append(number)
+                    position += len(line)
+            self.file = file
+            self.data = data
+            self.indexes = indexes
+            self.offsets = offsets
+        finally:
+            self.lock.release()
+
+    def close(self):
+        with self.lock:
+            self.offsets = None
+            if self.file is not None:
+                self.data.close()
+                self.file.close()
+            self.file = None
+            self.data = None
+            self.indexes = None
+
+    def __len__(self):
+        self.load(wait=False)
+        return len(self.offsets)
+
+    def __getitem__(self, number):
+        self.load(wait=False)
+        start = self.offsets[number]
+        end = self.data.find(b"\n", start)
+        return json.loads(self.data[start:end if end != -1 else len(self.data)])
+
+    def categories(self):
+        self.load(wait=False)
+        return sorted(category for category, difficulty in self.indexes if category is not None and difficulty is None)
+
+    def difficulties(self):
+        self.load(wait=False)
+        return sorted(difficulty for category, difficulty in self.indexes if category is None)
+
+    def pool(self, category=None, difficulty=None):
+        self.load(wait=False)
+        category = category.lower() if category else None
+        difficulty = difficulty.lower() if difficulty else None
+        if category is None and difficulty is None:
+            return range(len(self.offsets))
+        return self.indexes.get((category, difficulty), array("I"))
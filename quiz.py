@@ -1,34 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox
 
-# List of quiz questions, options, and correct answers
-questions = [
-    {
-        "question": "What is the capital of India?",
-        "options": ["Mumbai", "Kolkata", "Delhi", "Chennai"],
-        "answer": "Delhi"
-    },
-    {
-        "question": "Who wrote the national anthem?",
-        "options": ["Rabindranath Tagore", "Mahatma Gandhi", "Nehru", "Tilak"],
-        "answer": "Rabindranath Tagore"
-    },
-    {
-        "question": "Which planet is known as the Red Planet?",
-        "options": ["Earth", "Mars", "Venus", "Jupiter"],
-        "answer": "Mars"
-    },
-    {
-        "question": "What is the currency of Japan?",
-        "options": ["Won", "Yen", "Rupee", "Dollar"],
-        "answer": "Yen"
-    },
-    {
-        "question": "Who invented the light bulb?",
-        "options": ["Newton", "Einstein", "Edison", "Tesla"],
-        "answer": "Edison"
-    }
-]
+from quiz_engine import QUESTIONS as questions
 
 # Track question index and score
 current_question = 0
@@ -0,0 +1,148 @@
+import time
+
+from checkin import TimingWheel
+from question_bank import QuestionBank, SeenSet, sample
+
+QUESTIONS = [
+    {
+        "question": "What is the capital of India?",
+        "options": ["Mumbai", "Kolkata", "Delhi", "Chennai"],
+        "answer": "Delhi"
+    },
+    {
+        "question": "Who wrote the national anthem?",
+        "options": ["Rabindranath Tagore", "Mahatma Gandhi", "Nehru", "Tilak"],
+        "answer": "Rabindranath Tagore"
+    },
+    {
+        "question": "Which planet is known as the Red Planet?",
+        "options": ["Earth", "Mars", "Venus", "Jupiter"],
+        "answer": "Mars"
+    },
+    {
+        "question": "What is the currency of Japan?",
+        "options": ["Won", "Yen", "Rupee", "Dollar"],
+        "answer": "Yen"
+    },
+    {
+        "question": "Who invented the light bulb?",
+        "options": ["Newton", "Einstein", "Edison", "Tesla"],
+        "answer": "Edison"
+    }
+]
+
+
+class QuizSession:
+    # One running quiz, either a solo quiz for owner_id or an open quiz for a
+    # whole channel. scores maps user id to [points, correct answers].
+    __slots__ = ("key", "owner_id", "solo", "order", "index", "current", "asked_at", "answered", "scores", "names")
+
+    def __init__(self, key, owner_id, solo, order, asked_at):
+        self.key = key
+        self.owner_id = owner_id
+        self.solo = solo
+        self.order = order
+        self.index = 0
+        self.current = None
+        self.asked_at = asked_at
+        self.answered = set()
+        self.scores = {}
+        self.names = {}
+
+    def finished(self):
+        return self.index >= len(self.order)
+
+    def results(self):
+        return sorted(((user_id, points, correct) for user_id, (points, correct) in self.scores.items()),
+                      key=lambda result: result[1], reverse=True)
+
+
+class QuizEngine:
+    # All sessions live in one dict and all question timers in one timing
+    # wheel, so a tick costs the same with ten quizzes running or ten thousand.
+    # questions is a plain list or a QuestionBank; seen remembers per session
+    # key which questions were already asked so the next quiz does not repeat.
+    def __init__(self, questions=QUESTIONS, question_seconds=20, now=None):
+        self.questions = questions
+        self.question_seconds = question_seconds
+        self.sessions = {}
+        self.seen = {}
+        self.wheel = TimingWheel(tick=1.0, slots=256, now=time.time() if now is None else now)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def start(self, key, owner_id, solo=True, count=5, now=None, category=None, difficulty=None):
+        if key in self.sessions:
+            raise ValueError("A quiz is already running here!")
+        if isinstance(self.questions, QuestionBank):
+            pool = self.questions.pool(category, difficulty)
+        elif category or difficulty:
+            raise ValueError("Categories and difficulties need a question bank!")
+        else:
+            pool = range(len(self.questions))
+        if count <= 0 or not pool:
+            raise ValueError("There are no questions to ask!")
+        now = time.time() if now is None else now
+        order = tuple(sample(pool, self.seen.setdefault(key, SeenSet()), count))
+        session = QuizSession(key, owner_id, solo, order, now)
+        session.current = self.questions[order[0]]
+        self.sessions[key] = session
+        self.wheel.schedule(key, now + self.question_seconds, 0)
+        return session
+
+    def question(self, session):
+        if session.finished():
+            return None
+        return session.current
+
+    def answer(self, key, user_id, index, choice, now=None, name=None):
+        # index is the question the button was shown for, so clicks on an
+        # older question's message are turned away
+        session = self.sessions.get(key)
+        if session is None or session.index != index:
+            raise ValueError("This question is already closed!")
+        if session.solo and user_id != session.owner_id:
+            raise ValueError("This is not your quiz!")
+        if user_id in session.answered:
+            raise ValueError("You already answered this question!")
+        now = time.time() if now is None else now
+        session.answered.add(user_id)
+        if name is not None:
+            session.names[user_id] = name
+        score = session.scores.setdefault(user_id, [0, 0])
+        question = self.question(session)
+        if question["options"][choice] != question["answer"]:
+            return False
+        # a correct answer is worth 10, plus up to 10 more for answering fast
+        remaining = max(0.0, session.asked_at + self.question_seconds - now)
+        score[0] += 10 + round(10 * remaining / self.question_seconds)
+        score[1] += 1
+        return True
+
+    def next_question(self, key, now=None):
+        session = self.sessions[key]
+        session.index += 1
+        session.answered.clear()
+        if session.finished():
+            session.current = None
+            self.wheel.cancel(key)
+            return None
+        session.current = self.questions[session.order[session.index]]
+        session.asked_at = time.time() if now is None else now
+        self.wheel.schedule(key, session.asked_at + self.question_seconds, session.index)
+        return self.question(session)
+
+    def expire(self, now=None):
+        # sessions whose current question ran out of time; the caller moves
+        # them on with next_question
+        timed_out = []
+        for key, index in self.wheel.advance(time.time() if now is None else now):
+            session = self.sessions.get(key)
+            if session is not None and session.index == index:
+                timed_out.append(session)
+        return timed_out
+
+    def finish(self, key):
+        self.wheel.cancel(key)
+        return self.sessions.pop(key, None)
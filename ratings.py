@@ -0,0 +1,204 @@
+import json
+import os
+
+import numpy as np
+
+from storage import append_line
+
+GLICKO_SCALE = 173.7178
+
+
+def load_matches(file_path):
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path, "r") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def append_match(file_path, record):
+    append_line(file_path, json.dumps(record))
+
+
+class RatingEngine:
+    def __init__(self, system="elo", k_factor=32, tau=0.5, period_seconds=86400,
+                 initial_rating=1500.0, initial_rd=350.0, initial_vol=0.06):
+        if system not in ("elo", "glicko2"):
+            raise ValueError(f"Unknown rating system {system}")
+        self.system = system
+        self.k_factor = k_factor
+        self.tau = tau
+        self.period_seconds = period_seconds
+        self.initial_rating = initial_rating
+        self.initial_rd = initial_rd
+        self.initial_vol = initial_vol
+
+    def settings(self):
+        return [self.system, self.k_factor, self.tau, self.period_seconds,
+                self.initial_rating, self.initial_rd, self.initial_vol]
+
+    def new_entry(self):
+        return {"rating": self.initial_rating, "rd": self.initial_rd, "vol": self.initial_vol}
+
+    def new_state(self):
+        # base holds the ratings at the start of the current rating period
+        # (for Elo, simply the current ratings) and pending the Glicko-2
+        # results of the current period that are not folded into base yet
+        return {"settings": self.settings(), "period": None, "base": {}, "pending": [], "played": {}}
+
+    def compatible(self, state):
+        return bool(state) and state.get("settings") == self.settings()
+
+    def participants(self, record):
+        winner = record["winner"]
+        losers = [team for team in dict.fromkeys(record["losers"]) if team != winner]
+        return winner, losers
+
+    def apply(self, state, record):
+        # The only place results change ratings: live results and a full
+        # recompute both go through here in match history order, so the two
+        # always agree.
+        winner, losers = self.participants(record)
+        if not losers:
+            return state
+        for team in [winner] + losers:
+            state["played"][team] = state["played"].get(team, 0) + 1
+        if self.system == "elo":
+            self.rate_elo_result(state["base"], winner, losers)
+            return state
+        period = record.get("time", 0) // self.period_seconds
+        if state["period"] is None:
+            state["period"] = period
+        elif period > state["period"]:
+            state["base"] = self.rate_period(state["base"], state["pending"], inflate=True)
+            state["pending"] = []
+            self.inflate_idle(state["base"], period - state["period"] - 1)
+            state["period"] = period
+        # a result reported late still lands in the current period
+        state["pending"].append([winner, losers])
+        return state
+
+    def recompute(self, records):
+        state = self.new_state()
+        for record in records:
+            self.apply(state, record)
+        return state
+
+    def ratings(self, state):
+        # current standings: base plus the results of the open period, rated
+        # as if the period ended now
+        table = self.rate_period(state["base"], state["pending"], inflate=False) if state["pending"] else state["base"]
+        return {team: dict(entry, played=state["played"].get(team, 0)) for team, entry in table.items()}
+
+    def snapshot(self, state):
+        return dict(state, ratings=self.ratings(state))
+
+    def rate_elo_result(self, base, winner, losers):
+        # a tournament win counts as 1/(n-1) of a win over each other entrant
+        # so large fields do not swing ratings more than small ones
+        for team in [winner] + losers:
+            base.setdefault(team, self.new_entry())
+        before = {team: base[team]["rating"] for team in [winner] + losers}
+        for loser in losers:
+            expected = 1 / (1 + 10 ** ((before[loser] - before[winner]) / 400))
+            delta = self.k_factor / len(losers) * (1 - expected)
+            base[winner]["rating"] += delta
+            base[loser]["rating"] -= delta
+
+    def rate_period(self, base, pending, inflate):
+        # all Glicko-2 results of one period, rated together against the
+        # ratings at its start; inflate also grows the RD of idle teams
+        names = {}
+        winners, losers, weights = [], [], []
+        if inflate:
+            for team in base:
+                names.setdefault(team, len(names))
+        for winner, record_losers in pending:
+            w = names.setdefault(winner, len(names))
+            for loser in record_losers:
+                winners.append(w)
+                losers.append(names.setdefault(loser, len(names)))
+                weights.append(1 / len(record_losers))
+        entries = [base.get(team) or self.new_entry() for team in names]
+        rating = np.array([entry["rating"] for entry in entries], dtype=float)
+        rd = np.array([entry["rd"] for entry in entries], dtype=float)
+        vol = np.array([entry["vol"] for entry in entries], dtype=float)
+        if winners:
+            self.rate_glicko2(rating, rd, vol, np.array(winners, dtype=np.int64), np.array(losers, dtype=np.int64),
+                              np.array(weights, dtype=float), inflate)
+        table = dict(base)
+        for i, team in enumerate(names):
+            table[team] = {"rating": float(rating[i]), "rd": float(rd[i]), "vol": float(vol[i])}
+        return table
+
+    def inflate_idle(self, base, periods):
+        # periods in which nobody played at all
+        if periods <= 0:
+            return
+        for entry in base.values():
+            entry["rd"] = min(float(np.sqrt(entry["rd"] ** 2 + periods * (entry["vol"] * GLICKO_SCALE) ** 2)), self.initial_rd)
+
+    def rate_glicko2(self, rating, rd, vol, winners, losers, weights, inflate):
+        count = len(rating)
+        mu = (rating - 1500) / GLICKO_SCALE
+        phi = rd / GLICKO_SCALE
+        players = np.concatenate((winners, losers))
+        opponents = np.concatenate((losers, winners))
+        scores = np.concatenate((np.ones(len(winners)), np.zeros(len(losers))))
+        game_weights = np.concatenate((weights, weights))
+
+        g = 1 / np.sqrt(1 + 3 * phi[opponents] ** 2 / np.pi ** 2)
+        expected = 1 / (1 + np.exp(-g * (mu[players] - mu[opponents])))
+        v_inv = np.bincount(players, weights=game_weights * g ** 2 * expected * (1 - expected), minlength=count)
+        score_sum = np.bincount(players, weights=game_weights * g * (scores - expected), minlength=count)
+
+        active = v_inv > 0
+        if inflate:
+            idle = ~active
+            phi[idle] = np.minimum(np.sqrt(phi[idle] ** 2 + vol[idle] ** 2), self.initial_rd / GLICKO_SCALE)
+        if active.any():
+            v = 1 / v_inv[active]
+            delta = v * score_sum[active]
+            new_vol = self.glicko2_volatility(phi[active], vol[active], v, delta)
+            phi_star = np.sqrt(phi[active] ** 2 + new_vol ** 2)
+            new_phi = 1 / np.sqrt(1 / phi_star ** 2 + 1 / v)
+            mu[active] += new_phi ** 2 * score_sum[active]
+            phi[active] = new_phi
+            vol[active] = new_vol
+        rating[:] = mu * GLICKO_SCALE + 1500
+        rd[:] = phi * GLICKO_SCALE
+
+    def glicko2_volatility(self, phi, vol, v, delta, epsilon=1e-6):
+        # step 5 of Glickman's Glicko-2 paper (Illinois algorithm), run for
+        # every team in the period at once
+        tau = self.tau
+        a = np.log(vol ** 2)
+
+        def f(x):
+            ex = np.exp(x)
+            return ex * (delta ** 2 - phi ** 2 - v - ex) / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+        big = delta ** 2 > phi ** 2 + v
+        B = np.log(np.where(big, delta ** 2 - phi ** 2 - v, 1.0))
+        k = np.ones(len(a))
+        searching = ~big
+        while True:
+            searching = searching & (f(a - k * tau) < 0)
+            if not searching.any():
+                break
+            k[searching] += 1
+        B = np.where(big, B, a - k * tau)
+        A = a.copy()
+        fA, fB = f(A), f(B)
+        for _ in range(100):
+            running = np.abs(B - A) > epsilon
+            if not running.any():
+                break
+            with np.errstate(divide="ignore", invalid="ignore"):
+                C = np.where(running, A + (A - B) * fA / (fB - fA), B)
+            fC = f(C)
+            swap = fC * fB <= 0
+            A = np.where(running & swap, B, A)
+            fA = np.where(running, np.where(swap, fB, fA / 2), fA)
+            B = np.where(running, C, B)
+            fB = np.where(running, fC, fB)
+        return np.exp(A / 2)
@@ -0,0 +1,159 @@
+import hashlib
+import math
+from collections import defaultdict
+
+from search_index import normalize, normalize_contact
+
+
+def identity_key(kind, value):
+    if kind == "contact":
+        value = normalize_contact(value)
+    elif kind == "user":
+        value = str(value).strip("<@!> ")
+    else:
+        value = normalize(value)
+    return f"{kind}:{value}" if value else None
+
+
+def identity_keys(user_id, team_name, players, contact_number):
+    keys = [("user", identity_key("user", user_id)), ("team", identity_key("team", team_name)),
+            ("contact", identity_key("contact", contact_number))]
+    keys += [("ign", identity_key("ign", player)) for player in players]
+    return [(kind, key) for kind, key in keys if key]
+
+
+def team_identity_keys(team):
+    return identity_keys(team["team_id"], team["team_name"], team["players"], team["contact_number"])
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class RegistrationGuard:
+    def __init__(self, bloom_threshold=50000):
+        self.bloom_threshold = bloom_threshold
+        self.registered = defaultdict(dict)
+        # identity key -> Discord user id of the registration in progress
+        self.pending = defaultdict(dict)
+        self.banned = set()
+        self.ban_filter = None
+
+    def build(self, all_data, bans):
+        for tournament_id, tournament_data in all_data.items():
+            for secret_id, team in tournament_data.get("teams", {}).items():
+                self.add_team(tournament_id, secret_id, team)
+        self.banned = set(bans)
+        self.rebuild_ban_filter()
+
+    def rebuild_ban_filter(self):
+        # the exact set stays the source of truth, the filter only lets the
+        # common "not banned" answer skip hashing into a very large set
+        if len(self.banned) < self.bloom_threshold:
+            self.ban_filter = None
+            return
+        self.ban_filter = BloomFilter(len(self.banned) * 2)
+        for key in self.banned:
+            self.ban_filter.add(key)
+
+    def add_team(self, tournament_id, secret_id, team):
+        if team.get("registration") in ("Rejected", "Released"):
+            return
+        registered = self.registered[str(tournament_id)]
+        for kind, key in team_identity_keys(team):
+            registered[key] = secret_id
+        self.release(tournament_id, team["team_id"])
+
+    def remove_team(self, tournament_id, secret_id, team):
+        registered = self.registered[str(tournament_id)]
+        for kind, key in team_identity_keys(team):
+            if registered.get(key) == secret_id:
+                del registered[key]
+
+    def is_banned(self, key):
+        if self.ban_filter is not None and key not in self.ban_filter:
+            return False
+        return key in self.banned
+
+    def ban(self, key):
+        self.banned.add(key)
+        if self.ban_filter is not None:
+            self.ban_filter.add(key)
+        elif len(self.banned) >= self.bloom_threshold:
+            self.rebuild_ban_filter()
+
+    def unban(self, key):
+        self.banned.discard(key)
+        self.rebuild_ban_filter()
+
+    def reserve(self, tournament_id, user_id, team_name, players, contact_number, replace=False):
+        # Holds every identity key of a registration while its channel and
+        # payment link are live, so nobody else can start the same team.
+        # replace=True swaps in edited details for the user's own reservation.
+        pending = self.pending[str(tournament_id)]
+        if not replace and pending.get(identity_key("user", user_id)) == user_id:
+            return "You already have a registration in progress for this tournament!"
+        reason = self.check(tournament_id, user_id, team_name, players, contact_number)
+        if reason:
+            return reason
+        self.release(tournament_id, user_id)
+        for kind, key in identity_keys(user_id, team_name, players, contact_number):
+            pending[key] = user_id
+        return None
+
+    def release(self, tournament_id, user_id):
+        pending = self.pending[str(tournament_id)]
+        for key in [key for key, owner in pending.items() if owner == user_id]:
+            del pending[key]
+
+    def check(self, tournament_id, user_id, team_name, players, contact_number):
+        registered = self.registered.get(str(tournament_id), {})
+        pending = self.pending.get(str(tournament_id), {})
+        messages = {
+            "user": "This Discord account is banned from registering!",
+            "team": f"Team name **{team_name}** is banned!",
+            "contact": "This contact number is banned from registering!",
+            "ign": "Player **{}** is banned from registering!",
+        }
+        duplicate_messages = {
+            "user": "You have already registered a team in this tournament!",
+            "team": f"Team name **{team_name}** is already registered in this tournament!",
+            "contact": "This contact number is already registered in this tournament!",
+            "ign": "Player **{}** is already registered in this tournament!",
+        }
+        pending_messages = {
+            "user": "You already have a registration in progress for this tournament!",
+            "team": f"Team name **{team_name}** is already being registered in this tournament!",
+            "contact": "This contact number is already being registered in this tournament!",
+            "ign": "Player **{}** is already being registered in this tournament!",
+        }
+        for kind, key in identity_keys(user_id, team_name, players, contact_number):
+            if self.is_banned(key):
+                message = messages[kind]
+            elif key in registered:
+                message = duplicate_messages[kind]
+            elif pending.get(key, user_id) != user_id:
+                message = pending_messages[kind]
+            else:
+                continue
+            if kind == "ign":
+                message = message.format(key.split(":", 1)[1])
+            return message
+        return None
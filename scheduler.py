@@ -0,0 +1,116 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import Counter, defaultdict
+
+from storage import load_json, save_json
+
+
+class EventScheduler:
+    # One min-heap of (due, seq, kind, payload) for every timed event of every
+    # tournament. A single task sleeps until the earliest entry is due, so the
+    # number of timers does not grow with the number of tournaments. Entries
+    # are persisted per guild, in the file path_for(guild_id) returns; each
+    # guild's entries are also kept on their own so saving one guild, or
+    # asking whether an event is queued, never walks the whole heap.
+    def __init__(self, path_for):
+        self.path_for = path_for
+        self.heap = []
+        self.guild_entries = defaultdict(dict)
+        self.keys = Counter()
+        self.loaded = set()
+        self.handlers = {}
+        self.counter = itertools.count()
+        self.wakeup = None
+        self.task = None
+
+    def load(self, guild_id):
+        if guild_id in self.loaded:
+            return
+        self.loaded.add(guild_id)
+        for due, kind, payload in load_json(self.path_for(guild_id)) or []:
+            entry = (due, next(self.counter), kind, payload)
+            self.heap.append(entry)
+            self.track(entry)
+        heapq.heapify(self.heap)
+
+    def save(self, guild_id):
+        entries = [[due, kind, payload] for due, seq, kind, payload in sorted(self.guild_entries[guild_id].values())]
+        save_json(self.path_for(guild_id), entries)
+
+    def event_key(self, kind, payload):
+        return kind, tuple(sorted(payload.items()))
+
+    def track(self, entry):
+        due, seq, kind, payload = entry
+        self.guild_entries[payload["guild_id"]][seq] = entry
+        self.keys[self.event_key(kind, payload)] += 1
+
+    def untrack(self, entry):
+        due, seq, kind, payload = entry
+        del self.guild_entries[payload["guild_id"]][seq]
+        key = self.event_key(kind, payload)
+        self.keys[key] -= 1
+        if not self.keys[key]:
+            del self.keys[key]
+
+    def handler(self, kind):
+        def register(func):
+            self.handlers[kind] = func
+            return func
+        return register
+
+    def schedule(self, due, kind, payload):
+        entry = (due, next(self.counter), kind, payload)
+        heapq.heappush(self.heap, entry)
+        self.track(entry)
+        self.save(payload["guild_id"])
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def has(self, kind, payload):
+        return self.event_key(kind, payload) in self.keys
+
+    def cancel(self, kind, match):
+        entries = list(self.guild_entries[match["guild_id"]].values()) if "guild_id" in match else self.heap
+        cancelled = [entry for entry in entries
+                     if entry[2] == kind and all(entry[3].get(key) == value for key, value in match.items())]
+        if not cancelled:
+            return
+        seqs = {entry[1] for entry in cancelled}
+        self.heap = [entry for entry in self.heap if entry[1] not in seqs]
+        heapq.heapify(self.heap)
+        for entry in cancelled:
+            self.untrack(entry)
+        for guild_id in {entry[3]["guild_id"] for entry in cancelled}:
+            self.save(guild_id)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self.run())
+
+    async def run(self):
+        while True:
+            if self.heap and self.heap[0][0] <= time.time():
+                # anything missed while the bot was down is due already and
+                # comes off the heap here, oldest first
+                due, seq, kind, payload = entry = heapq.heappop(self.heap)
+                self.untrack(entry)
+                handler = self.handlers.get(kind)
+                try:
+                    if handler is None:
+                        print(f"No handler for scheduled event {kind}")
+                    else:
+                        await handler(due, payload)
+                except Exception as e:
+                    print(f"Error running scheduled event {kind} {payload}: {e}")
+                self.save(payload["guild_id"])
+                continue
+            self.wakeup.clear()
+            timeout = self.heap[0][0] - time.time() if self.heap else None
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
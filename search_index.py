@@ -0,0 +1,151 @@
+import bisect
+from collections import defaultdict
+
+
+def normalize(text):
+    return " ".join(str(text).lower().split())
+
+
+def normalize_contact(value):
+    # +91 98765 43210 and 9876543210 are the same number
+    return "".join(ch for ch in str(value) if ch.isdigit())[-10:]
+
+
+def contact_query(query):
+    # a query that looks like a phone number is matched in the same form the
+    # numbers are stored in; longer digit strings are Discord ids
+    digits = "".join(ch for ch in query if ch.isdigit())
+    if digits and len(digits) <= 13 and all(ch.isdigit() or ch in "+-() " for ch in query):
+        return normalize_contact(digits)
+    return query
+
+
+def deletes(term):
+    # Every variant of term with one character removed. Two terms within edit
+    # distance 1 always share at least one entry of term + deletes(term).
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def within_one_edit(a, b):
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        # adjacent swap, e.g. "scott" / "sctot"
+        return i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    return a[i:] == b[i + 1:]
+
+
+class TeamIndex:
+    def __init__(self, min_fuzzy_length=3):
+        self.min_fuzzy_length = min_fuzzy_length
+        self.teams = {}
+        self.postings = defaultdict(set)
+        self.terms = []
+        self.fuzzy = defaultdict(set)
+        self.team_terms = {}
+
+    def build(self, all_data):
+        for tournament_id, tournament_data in all_data.items():
+            for secret_id, team in tournament_data.get("teams", {}).items():
+                self.add_team(tournament_id, secret_id, team, tournament_data.get("tournament_name"))
+
+    def team_keys(self, team):
+        # whole names plus each of their words, so "phoenix" and "rising"
+        # both find "Phoenix Rising"
+        keys = set()
+        for name in [team.get("team_name", "")] + list(team.get("players", [])):
+            name = normalize(name)
+            keys.add(name)
+            keys.update(name.split())
+        keys.add(normalize_contact(team.get("contact_number", "")))
+        keys.add(str(team.get("team_id", "")))
+        keys.discard("")
+        return keys
+
+    def add_team(self, tournament_id, secret_id, team, tournament_name=None):
+        if secret_id in self.teams:
+            self.remove_team(secret_id)
+        self.teams[secret_id] = (str(tournament_id), tournament_name, team)
+        keys = self.team_keys(team)
+        self.team_terms[secret_id] = keys
+        for key in keys:
+            if key not in self.postings:
+                bisect.insort(self.terms, key)
+                if self.fuzzy_term(key):
+                    for variant in deletes(key) | {key}:
+                        self.fuzzy[variant].add(key)
+            self.postings[key].add(secret_id)
+
+    def remove_team(self, secret_id):
+        if secret_id not in self.teams:
+            return
+        del self.teams[secret_id]
+        for key in self.team_terms.pop(secret_id):
+            postings = self.postings[key]
+            postings.discard(secret_id)
+            if postings:
+                continue
+            del self.postings[key]
+            del self.terms[bisect.bisect_left(self.terms, key)]
+            if self.fuzzy_term(key):
+                for variant in deletes(key) | {key}:
+                    self.fuzzy[variant].discard(key)
+                    if not self.fuzzy[variant]:
+                        del self.fuzzy[variant]
+
+    def fuzzy_term(self, term):
+        # Discord ids and contact numbers one digit apart belong to other
+        # people, so only text gets typo matching
+        return len(term) >= self.min_fuzzy_length and not term.isdigit()
+
+    def prefix_terms(self, prefix, limit):
+        start = bisect.bisect_left(self.terms, prefix)
+        found = []
+        for term in self.terms[start:start + limit]:
+            if not term.startswith(prefix):
+                break
+            found.append(term)
+        return found
+
+    def fuzzy_terms(self, query):
+        if not self.fuzzy_term(query):
+            return []
+        candidates = set()
+        for variant in deletes(query) | {query}:
+            candidates |= self.fuzzy.get(variant, set())
+        return sorted(term for term in candidates if within_one_edit(query, term))
+
+    def search(self, query, limit=10):
+        query = contact_query(normalize(query))
+        if not query:
+            return []
+        if query in self.teams:
+            return [query]
+        results = []
+        seen = set()
+        # exact matches first, then prefix completions, then one-typo matches
+        ranked_terms = []
+        if query in self.postings:
+            ranked_terms.append(query)
+        ranked_terms += self.prefix_terms(query, limit * 4)
+        ranked_terms += self.fuzzy_terms(query)
+        for term in ranked_terms:
+            for secret_id in sorted(self.postings.get(term, ())):
+                if secret_id not in seen:
+                    seen.add(secret_id)
+                    results.append(secret_id)
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def get(self, secret_id):
+        return self.teams.get(secret_id)
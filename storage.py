@@ -0,0 +1,112 @@
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(file_path):
+    # An advisory lock next to the data file. flock is not re-entrant across
+    # separate opens, so take it once per operation: load_json and save_json
+    # each hold it for a single read or write, update_json for a whole
+    # read-modify-write. Shards are also kept apart because every guild is
+    # handled by exactly one shard.
+    with open(file_path + ".lock", "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def read_json(file_path):
+    try:
+        with open(file_path, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_json(file_path, data):
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(data, file, indent=4)
+    os.replace(temp_path, file_path)
+
+
+def load_json(file_path):
+    if not os.path.exists(file_path):
+        return {}
+    with file_lock(file_path):
+        return read_json(file_path)
+
+
+def save_json(file_path, data):
+    with file_lock(file_path):
+        write_json(file_path, data)
+
+
+def update_json(file_path, fn):
+    # fn changes the loaded data in place; nobody else can write the file
+    # between the read and the write. Returns whatever fn returns. fn must
+    # not do file I/O: opening this file again in the same process waits on
+    # the lock held here forever.
+    with file_lock(file_path):
+        data = read_json(file_path)
+        result = fn(data)
+        write_json(file_path, data)
+        return result
+
+
+def append_line(file_path, line):
+    with file_lock(file_path):
+        with open(file_path, "a") as file:
+            file.write(line + "\n")
+
+
+class GuildStorage:
+    # Every guild gets its own directory, so a lookup only ever reads that
+    # guild's files no matter how many guilds the bot is in.
+    def __init__(self, root="data"):
+        self.root = root
+        self.created = set()
+
+    def guild_dir(self, guild_id):
+        path = os.path.join(self.root, str(guild_id))
+        if path not in self.created:
+            os.makedirs(path, exist_ok=True)
+            self.created.add(path)
+        return path
+
+    def path(self, guild_id, name):
+        return os.path.join(self.guild_dir(guild_id), name)
+
+    def shared_path(self, name):
+        # files every shard process reads, next to the guild partitions
+        os.makedirs(self.root, exist_ok=True)
+        return os.path.join(self.root, name)
+
+    def guild_ids(self):
+        if not os.path.isdir(self.root):
+            return []
+        return [int(name) for name in os.listdir(self.root) if name.isdigit()]
+
+    def migrate(self, guild_id, file_names):
+        # one-off move of the old single-server files into a guild partition
+        for name in file_names:
+            target = self.path(guild_id, name)
+            if os.path.exists(name) and not os.path.exists(target):
+                os.replace(name, target)